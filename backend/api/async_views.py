@@ -0,0 +1,105 @@
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.http import Http404
+from django.shortcuts import redirect
+from django.utils.functional import classproperty
+from django.views import View
+
+from api.constants import SHORT_LINK_CACHE_TIMEOUT
+from api.recipe_utils import short_link_key
+from api.views import IngredientViewSet, RecipeViewSet, TagViewSet
+from recipes.models import Recipe
+
+
+class AsyncViewSetView(View):
+    """Асинхронная точка входа к действиям вьюсета DRF.
+
+    Запрос проходит тот же путь, что и в ``APIView.dispatch``:
+    аутентификацию, права и троттлинг из настроек вьюсета, действие
+    вьюсета и его обработку ошибок. Блокирующие шаги выполняются через
+    ``sync_to_async``, поэтому ответы не отличаются от синхронных.
+    """
+
+    viewset_class = None
+    actions = None
+
+    @classproperty
+    def view_is_async(cls):
+        # Все методы обслуживает асинхронный dispatch.
+        return True
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        view.csrf_exempt = True
+        return view
+
+    def get_viewset(self, request, *args, **kwargs):
+        """Вьюсет, настроенный так же, как в ``ViewSetMixin.as_view``."""
+        actions = dict(self.actions)
+        if "get" in actions and "head" not in actions:
+            actions["head"] = actions["get"]
+        viewset = self.viewset_class()
+        viewset.action_map = actions
+        for method, action in actions.items():
+            setattr(viewset, method, getattr(viewset, action))
+        viewset.request = request
+        viewset.args = args
+        viewset.kwargs = kwargs
+        return viewset
+
+    async def dispatch(self, request, *args, **kwargs):
+        viewset = self.get_viewset(request, *args, **kwargs)
+        request = viewset.initialize_request(request, *args, **kwargs)
+        viewset.request = request
+        viewset.headers = viewset.default_response_headers
+        try:
+            await sync_to_async(viewset.initial)(request, *args, **kwargs)
+            method = request.method.lower()
+            handler = viewset.http_method_not_allowed
+            if method in viewset.http_method_names:
+                handler = getattr(viewset, method, handler)
+            response = await sync_to_async(handler)(request, *args, **kwargs)
+        except Exception as exc:
+            response = await sync_to_async(viewset.handle_exception)(exc)
+        return viewset.finalize_response(request, response, *args, **kwargs)
+
+
+class RecipeListView(AsyncViewSetView):
+    viewset_class = RecipeViewSet
+    actions = {"get": "list", "post": "create"}
+
+
+class RecipeDetailView(AsyncViewSetView):
+    viewset_class = RecipeViewSet
+    actions = {
+        "get": "retrieve",
+        "put": "update",
+        "patch": "partial_update",
+        "delete": "destroy",
+    }
+
+
+class TagListView(AsyncViewSetView):
+    viewset_class = TagViewSet
+    actions = {"get": "list"}
+
+
+class IngredientListView(AsyncViewSetView):
+    viewset_class = IngredientViewSet
+    actions = {"get": "list"}
+
+
+async def redirect_short_link(request, code):
+    key = short_link_key(code)
+    recipe_id = await cache.aget(key)
+    if recipe_id is None:
+        recipe_id = (
+            await Recipe.objects.filter(slug=code)
+            .values_list("id", flat=True)
+            .afirst()
+        )
+        if recipe_id is None:
+            raise Http404
+        await cache.aset(key, recipe_id, SHORT_LINK_CACHE_TIMEOUT)
+    return redirect(request.build_absolute_uri(f"/recipes/{recipe_id}/"))
@@ -0,0 +1,455 @@
+import json
+import random
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import DEFAULT_DB_ALIAS, connection, connections, reset_queries
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.feed_utils import rebuild_feeds
+from api.ranking_utils import recompute_scores
+from api.search_utils import rebuild_search_index
+from api.similarity_utils import recompute_similar_recipes
+from ingredients.models import Ingredient
+from recipes.models import Recipe, RecipeIngredientAmount, RecipeTags
+from tags.models import Tag
+from users import user_utils as us
+from users.constans import INTERACTION_FAVORITE, INTERACTION_SHOPPING_CART
+from users.models import RecipeInteraction, Subscription
+
+User = get_user_model()
+
+FIXTURES_DIR = Path(settings.BASE_DIR) / "fixtures"
+BATCH_SIZE = 2000
+PASSWORD = "benchmark-password"
+TINY_PNG = (
+    "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAA"
+    "DUlEQVR42mP8z8DwHwAFBQIAX8jx0gAAAABJRU5ErkJggg=="
+)
+
+
+def _load_fixture(name):
+    with open(FIXTURES_DIR / name, encoding="utf-8") as fixture:
+        return [item["fields"] for item in json.load(fixture)]
+
+
+def _short_slug(number):
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    slug = ""
+    while True:
+        number, rest = divmod(number, len(digits))
+        slug = digits[rest] + slug
+        if not number:
+            return slug
+
+
+def seed_dataset(
+    users=100,
+    recipes=1000,
+    ingredients_per_recipe=6,
+    favorites_per_user=20,
+    cart_per_user=5,
+    subscriptions_per_user=10,
+    seed=0,
+):
+    """Наполняет пустую базу синтетическими данными для замеров."""
+    rng = random.Random(seed)
+    Tag.objects.bulk_create(
+        Tag(**fields) for fields in _load_fixture("tags.json")
+    )
+    Ingredient.objects.bulk_create(
+        (Ingredient(**fields) for fields in _load_fixture("ingredients.json")),
+        batch_size=BATCH_SIZE,
+    )
+    password = make_password(PASSWORD)
+    User.objects.bulk_create(
+        (
+            User(
+                username=f"user{number}",
+                email=f"user{number}@example.com",
+                first_name="Имя",
+                last_name="Фамилия",
+                password=password,
+            )
+            for number in range(users)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    user_ids = list(User.objects.values_list("id", flat=True))
+    tag_ids = list(Tag.objects.values_list("id", flat=True))
+    ingredient_ids = list(Ingredient.objects.values_list("id", flat=True))
+
+    for start in range(0, recipes, BATCH_SIZE):
+        batch = Recipe.objects.bulk_create(
+            Recipe(
+                author_id=rng.choice(user_ids),
+                name=f"Рецепт {number}",
+                text="Описание рецепта " * 10,
+                cooking_time=rng.randint(1, 180),
+                slug=_short_slug(number),
+            )
+            for number in range(start, min(start + BATCH_SIZE, recipes))
+        )
+        if not batch[0].pk:
+            batch = Recipe.objects.order_by("-id")[: len(batch)]
+        RecipeIngredientAmount.objects.bulk_create(
+            RecipeIngredientAmount(
+                recipe_id=recipe.pk,
+                ingredient_id=ingredient_id,
+                amount=rng.randint(1, 500),
+            )
+            for recipe in batch
+            for ingredient_id in rng.sample(
+                ingredient_ids, ingredients_per_recipe
+            )
+        )
+        RecipeTags.objects.bulk_create(
+            RecipeTags(recipe_id=recipe.pk, tag_id=tag_id)
+            for recipe in batch
+            for tag_id in rng.sample(tag_ids, rng.randint(1, len(tag_ids)))
+        )
+
+    recipe_ids = list(Recipe.objects.values_list("id", flat=True))
+    lists = (
+        (us.FAVORITES, INTERACTION_FAVORITE, favorites_per_user),
+        (us.SHOPPING_CART, INTERACTION_SHOPPING_CART, cart_per_user),
+    )
+    for user_id in user_ids:
+        for through, kind, per_user in lists:
+            sample = rng.sample(recipe_ids, min(per_user, len(recipe_ids)))
+            through.objects.bulk_create(
+                through(foodgramuser_id=user_id, recipe_id=recipe_id)
+                for recipe_id in sample
+            )
+            RecipeInteraction.objects.bulk_create(
+                RecipeInteraction(
+                    user_id=user_id, recipe_id=recipe_id, kind=kind
+                )
+                for recipe_id in sample
+            )
+        authors = [author for author in user_ids if author != user_id]
+        Subscription.objects.bulk_create(
+            Subscription(subscriber_id=user_id, author_id=author_id)
+            for author_id in rng.sample(
+                authors, min(subscriptions_per_user, len(authors))
+            )
+        )
+    us.recount_counters()
+    rebuild_search_index()
+    rebuild_feeds()
+    recompute_scores()
+    recompute_similar_recipes(full=True)
+
+
+class Scenario:
+    """Один замеряемый запрос к API с необязательной подготовкой."""
+
+    def __init__(self, name, method, path, data=None, setup=None, reset=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.data = data
+        self.setup = setup
+        self.reset = reset
+
+    def prepare(self):
+        return self.setup() if self.setup else self.path
+
+    def request(self, client, path):
+        response = getattr(client, self.method)(path, self.data, format="json")
+        if getattr(response, "streaming", False):
+            b"".join(response.streaming_content)
+        return response
+
+    def cleanup(self):
+        if self.reset:
+            self.reset()
+
+
+def build_scenarios():
+    """Сценарии для всех маршрутов api/urls.py и короткой ссылки."""
+    user = User.objects.order_by("id").first()
+    author = (
+        User.objects.exclude(pk=user.pk).order_by("-recipes_count").first()
+    )
+    recipe = (
+        Recipe.objects.filter(author=user).first() or Recipe.objects.first()
+    )
+    other = Recipe.objects.exclude(author=user).exclude(favorited=user).first()
+    tag = Tag.objects.first()
+    ingredient = Ingredient.objects.order_by("id")[10]
+    recipe_payload = {
+        "name": "Новый рецепт",
+        "text": "Описание",
+        "cooking_time": 10,
+        "image": TINY_PNG,
+        "tags": list(Tag.objects.values_list("id", flat=True)[:2]),
+        "ingredients": [
+            {"id": ingredient_id, "amount": 10}
+            for ingredient_id in Ingredient.objects.values_list(
+                "id", flat=True
+            )[:5]
+        ],
+    }
+    if recipe.author_id != user.pk:
+        recipe.author = user
+        recipe.save()
+
+    def new_recipe_path():
+        created = Recipe.objects.create(
+            author=user, name="Удаляемый", text="-", cooking_time=1
+        )
+        return f"/api/recipes/{created.pk}/"
+
+    def delete_created():
+        Recipe.objects.filter(author=user, name="Новый рецепт").delete()
+
+    def restore_subscription():
+        us.subscribe(user, author)
+
+    token, _ = Token.objects.get_or_create(user=user)
+
+    def restore_token():
+        Token.objects.get_or_create(user=user, defaults={"key": token.key})
+
+    return [
+        Scenario(
+            "auth-login",
+            "post",
+            "/api/auth/token/login/",
+            {"email": user.email, "password": PASSWORD},
+        ),
+        Scenario("auth-logout", "post", "/api/auth/token/logout/",
+                 reset=restore_token),
+        Scenario("users-list", "get", "/api/users/?page=1&limit=6"),
+        Scenario("users-detail", "get", f"/api/users/{author.pk}/"),
+        Scenario("users-me", "get", "/api/users/me/"),
+        Scenario(
+            "users-set-password",
+            "post",
+            "/api/users/set_password/",
+            {"current_password": PASSWORD, "new_password": PASSWORD},
+        ),
+        Scenario("users-avatar-put", "put", "/api/users/me/avatar/",
+                 {"avatar": TINY_PNG}),
+        Scenario("users-avatar-delete", "delete", "/api/users/me/avatar/"),
+        Scenario(
+            "users-subscriptions",
+            "get",
+            "/api/users/subscriptions/?page=1&limit=6&recipes_limit=3",
+        ),
+        Scenario(
+            "users-unsubscribe",
+            "delete",
+            f"/api/users/{author.pk}/subscribe/",
+            reset=restore_subscription,
+        ),
+        Scenario(
+            "users-subscribe",
+            "post",
+            f"/api/users/{author.pk}/subscribe/",
+            setup=lambda: us.unsubscribe(user, author)
+            and f"/api/users/{author.pk}/subscribe/",
+        ),
+        Scenario("tags-list", "get", "/api/tags/"),
+        Scenario("tags-detail", "get", f"/api/tags/{tag.pk}/"),
+        Scenario("ingredients-list", "get", "/api/ingredients/"),
+        Scenario("ingredients-autocomplete", "get",
+                 "/api/ingredients/?name=са"),
+        Scenario("ingredients-detail", "get",
+                 f"/api/ingredients/{ingredient.pk}/"),
+        Scenario("recipes-list", "get", "/api/recipes/?page=1&limit=6"),
+        Scenario("recipes-list-deep", "get", "/api/recipes/?page=50&limit=6"),
+        Scenario(
+            "recipes-list-cursor", "get", "/api/recipes/?cursor=&limit=6"
+        ),
+        Scenario(
+            "recipes-list-tags",
+            "get",
+            f"/api/recipes/?page=1&limit=6&tags={tag.slug}",
+        ),
+        Scenario(
+            "recipes-search",
+            "get",
+            "/api/recipes/?page=1&limit=6&search="
+            + ingredient.name.split()[0],
+        ),
+        Scenario(
+            "recipes-list-popular",
+            "get",
+            "/api/recipes/?page=1&limit=6&ordering=popular",
+        ),
+        Scenario(
+            "recipes-list-trending-cursor",
+            "get",
+            "/api/recipes/?cursor=&limit=6&ordering=trending",
+        ),
+        Scenario(
+            "recipes-pantry",
+            "get",
+            "/api/recipes/pantry/?limit=10&"
+            + "&".join(
+                f"ingredients={ingredient_id}"
+                for ingredient_id in Ingredient.objects.values_list(
+                    "id", flat=True
+                )[:30]
+            ),
+        ),
+        Scenario("recipes-feed", "get", "/api/recipes/feed/?limit=6"),
+        Scenario(
+            "recipes-list-favorited",
+            "get",
+            "/api/recipes/?page=1&limit=6&is_favorited=1",
+        ),
+        Scenario("recipes-detail", "get", f"/api/recipes/{recipe.pk}/"),
+        Scenario("recipes-create", "post", "/api/recipes/", recipe_payload,
+                 reset=delete_created),
+        Scenario("recipes-update", "patch", f"/api/recipes/{recipe.pk}/",
+                 recipe_payload),
+        Scenario("recipes-delete", "delete", None, setup=new_recipe_path),
+        Scenario(
+            "recipes-favorite",
+            "post",
+            f"/api/recipes/{other.pk}/favorite/",
+            reset=lambda: us.remove_favorite(user, other),
+        ),
+        Scenario(
+            "recipes-unfavorite",
+            "delete",
+            f"/api/recipes/{other.pk}/favorite/",
+            setup=lambda: us.add_favorite(user, other)
+            or f"/api/recipes/{other.pk}/favorite/",
+        ),
+        Scenario(
+            "recipes-shopping-cart",
+            "post",
+            f"/api/recipes/{other.pk}/shopping_cart/",
+            reset=lambda: us.remove_from_cart(user, other),
+        ),
+        Scenario(
+            "recipes-shopping-cart-delete",
+            "delete",
+            f"/api/recipes/{other.pk}/shopping_cart/",
+            setup=lambda: us.add_to_cart(user, other)
+            or f"/api/recipes/{other.pk}/shopping_cart/",
+        ),
+        Scenario("recipes-similar", "get",
+                 f"/api/recipes/{recipe.pk}/similar/"),
+        Scenario("recipes-get-link", "get",
+                 f"/api/recipes/{recipe.pk}/get-link/"),
+        Scenario("recipes-download-shopping-cart", "get",
+                 "/api/recipes/download_shopping_cart/"),
+        Scenario("short-link-redirect", "get", f"/r/{recipe.slug}/"),
+    ], user
+
+
+def _percentile(samples, percent):
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[
+        percent - 1
+    ]
+
+
+def measure(scenario, client, repeat):
+    """Замеряет запросы к БД, задержку и пиковую память сценария.
+
+    Подготовка и откат сценария в замеры не входят.
+    """
+    scenario.request(client, scenario.prepare())
+    scenario.cleanup()
+
+    path = scenario.prepare()
+    reset_queries()
+    with CaptureQueriesContext(connection) as queries:
+        response = scenario.request(client, path)
+    query_count = len(queries)
+    scenario.cleanup()
+
+    timings = []
+    for _ in range(repeat):
+        path = scenario.prepare()
+        started = time.perf_counter()
+        scenario.request(client, path)
+        timings.append((time.perf_counter() - started) * 1000)
+        scenario.cleanup()
+
+    path = scenario.prepare()
+    tracemalloc.start()
+    scenario.request(client, path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    scenario.cleanup()
+    return {
+        "status": response.status_code,
+        "queries": query_count,
+        "p50_ms": round(_percentile(timings, 50), 3),
+        "p95_ms": round(_percentile(timings, 95), 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+
+def run_benchmark(repeat=20):
+    scenarios, user = build_scenarios()
+    token = Token.objects.get(user=user)
+    client = APIClient()
+    results = {}
+    for scenario in scenarios:
+        if scenario.name == "auth-login":
+            client.credentials()
+        else:
+            client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        results[scenario.name] = measure(scenario, client, repeat)
+    return results
+
+
+def measure_connection_setup(requests=100, alias=DEFAULT_DB_ALIAS):
+    """Сравнивает «соединение на запрос» с постоянным соединением.
+
+    Каждый «запрос» — один SELECT 1; разница средних показывает, сколько
+    времени на установку соединения экономит CONN_MAX_AGE.
+    """
+
+    def run(connection):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+
+    fresh = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        fresh_connection = connections.create_connection(alias)
+        run(fresh_connection)
+        fresh_connection.close()
+        fresh.append((time.perf_counter() - started) * 1000)
+
+    persistent = []
+    persistent_connection = connections.create_connection(alias)
+    persistent_connection.ensure_connection()
+    for _ in range(requests):
+        started = time.perf_counter()
+        if persistent_connection.settings_dict["CONN_HEALTH_CHECKS"]:
+            persistent_connection.is_usable()
+        run(persistent_connection)
+        persistent.append((time.perf_counter() - started) * 1000)
+    persistent_connection.close()
+
+    fresh_ms = statistics.fmean(fresh)
+    persistent_ms = statistics.fmean(persistent)
+    return {
+        "vendor": persistent_connection.vendor,
+        "requests": requests,
+        "fresh_connection_ms": round(fresh_ms, 3),
+        "persistent_connection_ms": round(persistent_ms, 3),
+        "saved_per_request_ms": round(fresh_ms - persistent_ms, 3),
+        "fresh_p95_ms": round(_percentile(fresh, 95), 3),
+        "persistent_p95_ms": round(_percentile(persistent, 95), 3),
+    }
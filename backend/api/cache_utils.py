@@ -0,0 +1,83 @@
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+def cache_key(namespace, *parts):
+    return ":".join(str(part) for part in (namespace, *parts))
+
+
+def version_key(namespace):
+    return cache_key("version", namespace)
+
+
+def get_versions(*namespaces):
+    """Возвращает метки времени последнего изменения пространств имен.
+
+    Отсутствующая версия (еще не записана или вытеснена из кеша)
+    считается изменением прямо сейчас. Записывает ее первый прочитавший
+    воркер, остальные получают то же значение.
+    """
+    keys = [version_key(namespace) for namespace in namespaces]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        now = time.time()
+        for key in missing:
+            cache.add(key, now, timeout=None)
+        stored = cache.get_many(missing)
+        versions.update({key: stored.get(key, now) for key in missing})
+    return [versions[key] for key in keys]
+
+
+def bump_versions(*namespaces):
+    now = time.time()
+    cache.set_many(
+        {version_key(namespace): now for namespace in namespaces},
+        timeout=None,
+    )
+
+
+def invalidate(*namespaces):
+    """Сбрасывает версии сразу и повторно после фиксации транзакции."""
+    bump_versions(*namespaces)
+    transaction.on_commit(lambda: bump_versions(*namespaces))
+
+
+def versioned_key(namespace, *parts):
+    """Ключ, который устаревает при смене версии пространства имен."""
+    (version,) = get_versions(namespace)
+    return cache_key(namespace, repr(version), *parts)
+
+
+def get_or_set_versioned(namespace, parts, default, timeout=None):
+    return cache.get_or_set(
+        versioned_key(namespace, *parts), default, timeout=timeout
+    )
+
+
+class LocalVersionedCache:
+    """Кеш процесса, пересобираемый при смене общей версии.
+
+    Версия хранится в общем кеше, поэтому изменение, сделанное в одном
+    воркере, сбрасывает локальные копии во всех остальных.
+    """
+
+    def __init__(self, namespace, factory):
+        self.namespace = namespace
+        self.factory = factory
+        self._lock = threading.Lock()
+        self._version = None
+        self._value = None
+
+    def get(self):
+        (version,) = get_versions(self.namespace)
+        if self._version == version:
+            return self._value
+        with self._lock:
+            if self._version != version:
+                self._value = self.factory()
+                self._version = version
+        return self._value
@@ -2,3 +2,51 @@ COOKING_TIME_MIN = 1
 COOKING_TIME_MAX = 32000
 AMOUNT_MIN = 1
 AMOUNT_MAX = 32000
+SHOPPING_LIST_CHUNK_SIZE = 500
+AUTOCOMPLETE_MAX_LIMIT = 100
+REFERENCE_CACHE_MAX_AGE = 60
+SHORT_LINK_CACHE_TIMEOUT = 24 * 60 * 60
+IMAGE_MAX_SIDE = 8000
+IMAGE_SPOOL_MAX_MEMORY = 1024 * 1024
+BASE64_CHUNK_SIZE = 64 * 1024
+IMAGE_QUALITY = 82
+IMAGE_VARIANTS = {
+    "thumb": (320, 320),
+    "card": (720, 720),
+    "full": (1600, 1600),
+}
+IMAGE_VARIANT_FORMATS = {"webp": "WEBP", "jpeg": "JPEG"}
+SHORT_IMAGE_VARIANT = ("thumb", "jpeg")
+BLOB_DIR = "blobs"
+MEDIA_GC_MIN_AGE_MINUTES = 60
+SEARCH_CONFIG = "russian"
+SEARCH_WEIGHTS = ("A", "B", "C")
+SEARCH_FTS_TABLE = "recipes_recipe_fts"
+SEARCH_FTS_WEIGHTS = (10.0, 4.0, 1.0)
+SEARCH_INDEX_BATCH_SIZE = 1000
+SEARCH_MAX_TERMS = 8
+SEARCH_STEM_MIN_LENGTH = 4
+FEED_FANOUT_THRESHOLD = 5000
+FEED_TIMELINE_LENGTH = 500
+FEED_BACKFILL_LIMIT = 50
+FEED_BATCH_SIZE = 1000
+RECIPE_ORDERINGS = {
+    "popular": "popularity_score",
+    "trending": "trending_score",
+}
+SCORE_WEIGHTS = {"favorite": 2.0, "shopping_cart": 1.0}
+SCORE_HALF_LIFE_HOURS = {
+    "popularity_score": 30 * 24,
+    "trending_score": 24,
+}
+SCORE_MIN_VALUE = 0.01
+PANTRY_MAX_INGREDIENTS = 100
+PANTRY_DEFAULT_LIMIT = 10
+PANTRY_MAX_LIMIT = 100
+PANTRY_MAX_CHANGES = 1000
+PANTRY_SYNC_OVERLAP = 100
+PANTRY_LOG_LENGTH = 10000
+PANTRY_BUILD_CHUNK_SIZE = 10000
+SIMILAR_RECIPES_LIMIT = 10
+SIMILARITY_TAG_WEIGHT = 0.5
+SIMILARITY_BATCH_SIZE = 500
@@ -0,0 +1,160 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, Q
+
+from api.constants import (
+    FEED_BACKFILL_LIMIT,
+    FEED_BATCH_SIZE,
+    FEED_FANOUT_THRESHOLD,
+    FEED_TIMELINE_LENGTH,
+)
+from api.pagination import keyset_filter
+from recipes.models import Recipe
+from users.models import FeedEntry, Subscription
+
+User = get_user_model()
+
+
+def is_fanned_out(author_id):
+    """Раскладываются ли рецепты автора по лентам подписчиков.
+
+    Рецепты авторов с очень большим числом подписчиков не копируются в
+    ленты, а подмешиваются при чтении.
+    """
+    return User.objects.filter(
+        pk=author_id, subscribers_count__lte=FEED_FANOUT_THRESHOLD
+    ).exists()
+
+
+def _add_entries(entries):
+    FeedEntry.objects.bulk_create(
+        entries, batch_size=FEED_BATCH_SIZE, ignore_conflicts=True
+    )
+
+
+def fan_out_recipe(recipe_id):
+    """Добавляет новый рецепт в ленты подписчиков автора."""
+    recipe = (
+        Recipe.objects.filter(pk=recipe_id)
+        .values("author_id", "pub_date")
+        .first()
+    )
+    if recipe is None or not is_fanned_out(recipe["author_id"]):
+        return 0
+    subscriber_ids = Subscription.objects.filter(
+        author_id=recipe["author_id"]
+    ).values_list("subscriber_id", flat=True)
+    entries = [
+        FeedEntry(
+            user_id=subscriber_id,
+            recipe_id=recipe_id,
+            pub_date=recipe["pub_date"],
+        )
+        for subscriber_id in subscriber_ids
+    ]
+    _add_entries(entries)
+    return len(entries)
+
+
+def backfill_timeline(subscriber_id, author_id):
+    """Добавляет в ленту последние рецепты автора после подписки."""
+    if not is_fanned_out(author_id):
+        return
+    recipes = Recipe.objects.filter(author_id=author_id).values_list(
+        "id", "pub_date"
+    )[:FEED_BACKFILL_LIMIT]
+    _add_entries(
+        FeedEntry(user_id=subscriber_id, recipe_id=pk, pub_date=pub_date)
+        for pk, pub_date in recipes
+    )
+
+
+def drop_author_from_timeline(subscriber_id, author_id):
+    FeedEntry.objects.filter(
+        user_id=subscriber_id, recipe__author_id=author_id
+    ).delete()
+
+
+def feed_keys(user, position, reverse, limit):
+    """Ключи ``(pub_date, id)`` следующих рецептов ленты пользователя.
+
+    Готовая лента читается по индексу, рецепты крупных авторов берутся
+    напрямую из их рецептов тем же курсором, после чего обе выборки
+    сливаются.
+    """
+    keys = list(
+        keyset_filter(
+            FeedEntry.objects.filter(user=user),
+            position,
+            reverse,
+            ("pub_date", "recipe_id"),
+        ).values_list("pub_date", "recipe_id")[:limit]
+    )
+    pulled_authors = list(
+        Subscription.objects.filter(
+            subscriber=user,
+            author__subscribers_count__gt=FEED_FANOUT_THRESHOLD,
+        )
+        .order_by()
+        .values_list("author_id", flat=True)
+    )
+    if pulled_authors:
+        keys.extend(
+            keyset_filter(
+                Recipe.objects.filter(author_id__in=pulled_authors),
+                position,
+                reverse,
+            ).values_list("pub_date", "id")[:limit]
+        )
+        keys = sorted(set(keys), reverse=not reverse)[:limit]
+    return keys
+
+
+def trim_timelines(length=FEED_TIMELINE_LENGTH):
+    """Обрезает ленты до ``length`` последних записей."""
+    overflowing = list(
+        FeedEntry.objects.order_by()
+        .values("user_id")
+        .annotate(total=Count("id"))
+        .filter(total__gt=length)
+        .values_list("user_id", flat=True)
+    )
+    removed = 0
+    for user_id in overflowing:
+        timeline = FeedEntry.objects.filter(user_id=user_id)
+        pub_date, recipe_id = timeline.order_by(
+            "-pub_date", "-recipe_id"
+        ).values_list("pub_date", "recipe_id")[length]
+        deleted, _ = timeline.filter(
+            Q(pub_date__lt=pub_date)
+            | Q(pub_date=pub_date, recipe_id__lte=recipe_id)
+        ).delete()
+        removed += deleted
+    return removed
+
+
+@transaction.atomic
+def rebuild_feeds(length=FEED_TIMELINE_LENGTH):
+    """Пересобирает ленты всех подписчиков с нуля."""
+    FeedEntry.objects.all().delete()
+    subscriber_ids = (
+        Subscription.objects.filter(
+            author__subscribers_count__lte=FEED_FANOUT_THRESHOLD
+        )
+        .order_by("subscriber_id")
+        .values_list("subscriber_id", flat=True)
+        .distinct()
+    )
+    total = 0
+    for subscriber_id in list(subscriber_ids):
+        recipes = Recipe.objects.filter(
+            author__subscribers__subscriber_id=subscriber_id,
+            author__subscribers_count__lte=FEED_FANOUT_THRESHOLD,
+        ).values_list("id", "pub_date")[:length]
+        entries = [
+            FeedEntry(user_id=subscriber_id, recipe_id=pk, pub_date=pub_date)
+            for pk, pub_date in recipes
+        ]
+        _add_entries(entries)
+        total += len(entries)
+    return total
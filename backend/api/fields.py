@@ -0,0 +1,69 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework.relations import (
+    MANY_RELATION_KWARGS,
+    ManyRelatedField,
+    PrimaryKeyRelatedField,
+)
+
+
+def resolve_in_bulk(resolver, pks):
+    """Находит объекты одним запросом и возвращает их и ненайденные id."""
+    found = resolver(pks)
+    missing = list(dict.fromkeys(pk for pk in pks if pk not in found))
+    return found, missing
+
+
+class BulkManyRelatedField(ManyRelatedField):
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, "__iter__"):
+            self.fail("not_a_list", input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail("empty")
+        return self.child_relation.to_internal_value_many(data)
+
+
+class BulkPrimaryKeyRelatedField(PrimaryKeyRelatedField):
+    """Поле первичных ключей, разрешающее список одним запросом IN.
+
+    ``resolver`` принимает список ключей и возвращает словарь
+    ключ -> объект; по умолчанию используется ``in_bulk`` по queryset.
+    """
+
+    default_error_messages = {
+        "does_not_exist": "Объекты с id {pk_value} не найдены.",
+    }
+
+    def __init__(self, resolver=None, **kwargs):
+        self.resolver = resolver
+        super().__init__(**kwargs)
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {"child_relation": cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
+
+    def resolve(self, pks):
+        if self.resolver is not None:
+            return self.resolver(pks)
+        return self.get_queryset().in_bulk(pks)
+
+    def to_internal_value_many(self, data):
+        pk_field = self.get_queryset().model._meta.pk
+        pks = []
+        for item in data:
+            if isinstance(item, bool):
+                self.fail("incorrect_type", data_type=type(item).__name__)
+            try:
+                pks.append(pk_field.to_python(item))
+            except (DjangoValidationError, TypeError, ValueError):
+                self.fail("incorrect_type", data_type=type(item).__name__)
+        found, missing = resolve_in_bulk(self.resolve, pks)
+        if missing:
+            self.fail(
+                "does_not_exist",
+                pk_value=", ".join(str(pk) for pk in missing),
+            )
+        return [found[pk] for pk in pks]
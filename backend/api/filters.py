@@ -1,6 +1,10 @@
 import django_filters
+from django.db.models import Exists, OuterRef
 
-from recipes.models import Recipe
+from api.constants import RECIPE_ORDERINGS
+from api.search_utils import search_recipes
+from api.tag_utils import tag_ids_by_slugs
+from recipes.models import Recipe, RecipeTags
 
 
 class RecipeFilter(django_filters.FilterSet):
@@ -13,12 +17,35 @@ class RecipeFilter(django_filters.FilterSet):
         method="filter_in_shopping_cart"
     )
     is_favorited = django_filters.CharFilter(method="filter_favorited")
+    search = django_filters.CharFilter(method="filter_search")
+    ordering = django_filters.ChoiceFilter(
+        choices=tuple((name, name) for name in RECIPE_ORDERINGS),
+        method="filter_ordering",
+    )
 
     def filter_tags(self, queryset, name, value):
         tags = self.request.GET.getlist("tags")
-        if tags:
-            return queryset.filter(tags__slug__in=tags).distinct()
-        return queryset
+        if not tags:
+            return queryset
+        tag_ids = tag_ids_by_slugs(tags)
+        if not tag_ids:
+            return queryset.none()
+        return queryset.filter(
+            Exists(
+                RecipeTags.objects.filter(
+                    recipe=OuterRef("pk"), tag_id__in=tag_ids
+                )
+            )
+        )
+
+    def filter_search(self, queryset, name, value):
+        if not value.strip():
+            return queryset
+        return search_recipes(queryset, value)
+
+    def filter_ordering(self, queryset, name, value):
+        score = RECIPE_ORDERINGS[value]
+        return queryset.order_by(f"-{score}", "-pub_date", "-id")
 
     def filter_in_shopping_cart(self, queryset, name, value):
         user = self.request.user
@@ -40,4 +67,6 @@ class RecipeFilter(django_filters.FilterSet):
             "tags__name",
             "tags",
             "is_favorited",
+            "search",
+            "ordering",
         ]
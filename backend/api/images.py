@@ -0,0 +1,277 @@
+import base64
+import binascii
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import BytesIO
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile, File
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from api.cache_utils import invalidate
+from api.constants import (
+    BASE64_CHUNK_SIZE,
+    BLOB_DIR,
+    IMAGE_MAX_SIDE,
+    IMAGE_QUALITY,
+    IMAGE_SPOOL_MAX_MEMORY,
+    IMAGE_VARIANT_FORMATS,
+    IMAGE_VARIANTS,
+)
+from recipes.models import Recipe
+
+User = get_user_model()
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class ImageUploadError(Exception):
+    """Ошибка загрузки с кодом сообщения поля и его параметрами."""
+
+    def __init__(self, code, **params):
+        super().__init__(code)
+        self.code = code
+        self.params = params
+
+
+def _check_content_type(content_type):
+    if content_type not in settings.IMAGE_ALLOWED_TYPES:
+        raise ImageUploadError(
+            "unsupported_type", types=", ".join(settings.IMAGE_ALLOWED_TYPES)
+        )
+
+
+def _check_size(size):
+    if size > settings.IMAGE_MAX_UPLOAD_SIZE:
+        raise ImageUploadError(
+            "too_big", max_size=settings.IMAGE_MAX_UPLOAD_SIZE
+        )
+
+
+def decode_base64_image(data):
+    """Декодирует data URI по частям во временный файл.
+
+    Тип и оценка размера проверяются до декодирования, поэтому
+    слишком большой или недопустимый файл отклоняется сразу.
+    """
+    start = data.find(";base64,")
+    if start == -1:
+        raise ImageUploadError("invalid_image")
+    content_type = data[len("data:"):start].lower()
+    _check_content_type(content_type)
+    start += len(";base64,")
+    padding = data.count("=", max(len(data) - 2, start))
+    _check_size((len(data) - start) * 3 // 4 - padding)
+
+    spooled = SpooledTemporaryFile(max_size=IMAGE_SPOOL_MAX_MEMORY)
+    try:
+        for offset in range(start, len(data), BASE64_CHUNK_SIZE):
+            spooled.write(
+                base64.b64decode(
+                    data[offset:offset + BASE64_CHUNK_SIZE], validate=True
+                )
+            )
+    except (ValueError, binascii.Error):
+        spooled.close()
+        raise ImageUploadError("invalid_image")
+    file = File(spooled, name="temp." + content_type.split("/")[-1])
+    file.size = spooled.tell()
+    spooled.seek(0)
+    return file
+
+
+def check_image(file):
+    """Проверяет файл средствами Pillow, не копируя его в память."""
+    _check_size(file.size)
+    try:
+        file.seek(0)
+        with Image.open(file) as image:
+            image.verify()
+        file.seek(0)
+        image = Image.open(file)
+    except Exception:
+        raise ImageUploadError("invalid_image")
+    _check_content_type(Image.MIME.get(image.format))
+    if max(image.size) > IMAGE_MAX_SIDE:
+        raise ImageUploadError("too_large", max_side=IMAGE_MAX_SIDE)
+    file.seek(0)
+    file.image = image
+    file.content_type = Image.MIME[image.format]
+    return file
+
+
+def get_executor():
+    """Пул потоков для обработки изображений; None — обработка в потоке."""
+    global _executor
+    if settings.IMAGE_WORKERS <= 0:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_WORKERS,
+                thread_name_prefix="images",
+            )
+    return _executor
+
+
+def _to_rgb(image):
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def render_variants(field_file):
+    """Сохраняет уменьшенные копии изображения во всех форматах."""
+    storage = field_file.storage
+    directory, filename = os.path.split(field_file.name)
+    stem = os.path.splitext(filename)[0]
+    with field_file.open("rb"), Image.open(field_file) as source:
+        source = _to_rgb(source)
+    variants = {"source": field_file.name}
+    for name, size in IMAGE_VARIANTS.items():
+        image = source.copy()
+        image.thumbnail(size, Image.Resampling.LANCZOS)
+        variants[name] = {}
+        for ext, image_format in IMAGE_VARIANT_FORMATS.items():
+            buffer = BytesIO()
+            image.save(buffer, image_format, quality=IMAGE_QUALITY)
+            variants[name][ext] = storage.save(
+                os.path.join(directory, "variants", f"{stem}_{name}.{ext}"),
+                ContentFile(buffer.getvalue()),
+            )
+    return variants
+
+
+def variant_paths(variants):
+    for name in IMAGE_VARIANTS:
+        yield from (variants or {}).get(name, {}).values()
+
+
+def process_image(model, pk, field_name, variants_field, namespace):
+    obj = model.objects.filter(pk=pk).only(field_name).first()
+    field_file = getattr(obj, field_name, None)
+    if not field_file:
+        return
+    variants = (
+        model.objects.filter(
+            **{f"{variants_field}__source": field_file.name}
+        )
+        .values_list(variants_field, flat=True)
+        .first()
+    ) or render_variants(field_file)
+    updated = model.objects.filter(
+        pk=pk, **{field_name: field_file.name}
+    ).update(**{variants_field: variants})
+    if updated:
+        invalidate(namespace)
+
+
+def _process_in_worker(*args):
+    try:
+        process_image(*args)
+    except Exception:
+        logger.exception("Не удалось обработать изображение %s", args)
+    finally:
+        connections.close_all()
+
+
+def schedule_variants(instance, field_name, variants_field, namespace):
+    """Ставит построение копий в очередь после фиксации транзакции.
+
+    Ничего не делает, если копии уже построены для текущего файла.
+    """
+    field_file = getattr(instance, field_name)
+    variants = getattr(instance, variants_field) or {}
+    if not field_file or variants.get("source") == field_file.name:
+        return
+    args = (type(instance), instance.pk, field_name, variants_field, namespace)
+
+    def submit():
+        executor = get_executor()
+        if executor is None:
+            process_image(*args)
+        else:
+            executor.submit(_process_in_worker, *args)
+
+    transaction.on_commit(submit)
+
+
+def variant_urls(field_file, variants, request):
+    """Абсолютные ссылки на копии, если они построены для текущего файла."""
+    if not field_file or (variants or {}).get("source") != field_file.name:
+        return None
+    return {
+        name: {
+            ext: request.build_absolute_uri(field_file.storage.url(path))
+            for ext, path in variants[name].items()
+        }
+        for name in IMAGE_VARIANTS
+        if name in variants
+    }
+
+
+def variant_url(field_file, variants, request, name, ext):
+    urls = variant_urls(field_file, variants, request) or {}
+    if ext in urls.get(name, {}):
+        return urls[name][ext]
+    if field_file:
+        return request.build_absolute_uri(field_file.url)
+    return None
+
+
+def referenced_media():
+    """Имена файлов, на которые ссылаются рецепты и аватары."""
+    names = set()
+    for model, field_name, variants_field in (
+        (Recipe, "image", "image_variants"),
+        (User, "avatar", "avatar_variants"),
+    ):
+        rows = (
+            model.objects.exclude(**{field_name: ""})
+            .values_list(field_name, variants_field)
+            .iterator()
+        )
+        for name, variants in rows:
+            names.add(name)
+            names.update(variant_paths(variants))
+    return names
+
+
+def collect_media_garbage(min_age_minutes, dry_run=False):
+    """Удаляет файлы хранилища, на которые никто не ссылается.
+
+    Файлы моложе min_age_minutes не трогаются: они могут принадлежать
+    еще не зафиксированной транзакции.
+    """
+    storage = default_storage
+    if not storage.exists(BLOB_DIR):
+        return []
+    referenced = referenced_media()
+    threshold = timezone.now() - timedelta(minutes=min_age_minutes)
+    removed = []
+    for directory in storage.listdir(BLOB_DIR)[0]:
+        for filename in storage.listdir(f"{BLOB_DIR}/{directory}")[1]:
+            name = f"{BLOB_DIR}/{directory}/{filename}"
+            if name in referenced:
+                continue
+            if storage.get_modified_time(name) > threshold:
+                continue
+            if not dry_run:
+                storage.delete(name)
+            removed.append(name)
+    return removed
@@ -0,0 +1,60 @@
+from bisect import bisect_left
+
+from api.cache_utils import LocalVersionedCache
+from api.constants import AUTOCOMPLETE_MAX_LIMIT
+from ingredients.models import Ingredient
+
+
+class IngredientSnapshot:
+    """Неизменяемый отсортированный срез ингредиентов для автодополнения."""
+
+    __slots__ = ("_keys", "_ingredients")
+
+    def __init__(self, ingredients):
+        rows = sorted(
+            ((ingredient.name.casefold(), ingredient.id), ingredient)
+            for ingredient in ingredients
+        )
+        self._keys = tuple(key for (key, _), _ in rows)
+        self._ingredients = tuple(ingredient for _, ingredient in rows)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def search(self, query, limit=None):
+        """Сначала ингредиенты, начинающиеся с запроса, затем содержащие."""
+        query = query.casefold()
+        start = bisect_left(self._keys, query)
+        end = start
+        while end < len(self._keys) and self._keys[end].startswith(query):
+            end += 1
+        result = list(self._ingredients[start:end][:limit])
+        if limit is not None and len(result) >= limit:
+            return result
+        for index, key in enumerate(self._keys):
+            if start <= index < end or query not in key:
+                continue
+            result.append(self._ingredients[index])
+            if limit is not None and len(result) >= limit:
+                break
+        return result
+
+
+ingredient_snapshot = LocalVersionedCache(
+    "ingredients",
+    lambda: IngredientSnapshot(
+        Ingredient.objects.only("id", "name", "measurement_unit")
+    ),
+)
+
+
+def parse_autocomplete_limit(value):
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        return None
+    return min(max(limit, 1), AUTOCOMPLETE_MAX_LIMIT)
+
+
+def search_ingredients(name, limit=None):
+    return ingredient_snapshot.get().search(name, limit)
@@ -0,0 +1,109 @@
+import json
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from api.benchmark import run_benchmark, seed_dataset
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(
+            ("git", "rev-parse", "HEAD"), stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет число запросов к БД, задержку p50/p95 и пиковую память "
+        "для каждого эндпоинта API на синтетических данных во временной БД."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--recipes", type=int, default=1000)
+        parser.add_argument("--ingredients-per-recipe", type=int, default=6)
+        parser.add_argument("--favorites-per-user", type=int, default=20)
+        parser.add_argument("--cart-per-user", type=int, default=5)
+        parser.add_argument("--subscriptions-per-user", type=int, default=10)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", default="benchmark.json")
+
+    def handle(self, *args, **options):
+        media_root = tempfile.mkdtemp(prefix="foodgram-benchmark-")
+        media_override = override_settings(
+            MEDIA_ROOT=media_root, IMAGE_WORKERS=0
+        )
+        media_override.enable()
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            started = time.perf_counter()
+            seed_dataset(
+                users=options["users"],
+                recipes=options["recipes"],
+                ingredients_per_recipe=options["ingredients_per_recipe"],
+                favorites_per_user=options["favorites_per_user"],
+                cart_per_user=options["cart_per_user"],
+                subscriptions_per_user=options["subscriptions_per_user"],
+                seed=options["seed"],
+            )
+            seed_seconds = time.perf_counter() - started
+            endpoints = run_benchmark(repeat=options["repeat"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            media_override.disable()
+            shutil.rmtree(media_root, ignore_errors=True)
+
+        report = {
+            "meta": {
+                "revision": _git_revision(),
+                "database": connection.vendor,
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "seed_seconds": round(seed_seconds, 2),
+                "dataset": {
+                    key: options[key]
+                    for key in (
+                        "users",
+                        "recipes",
+                        "ingredients_per_recipe",
+                        "favorites_per_user",
+                        "cart_per_user",
+                        "subscriptions_per_user",
+                        "seed",
+                    )
+                },
+                "repeat": options["repeat"],
+            },
+            "endpoints": endpoints,
+        }
+        with open(options["output"], "w", encoding="utf-8") as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+
+        for name, result in endpoints.items():
+            self.stdout.write(
+                f"{name:32} {result['status']:>4} "
+                f"{result['queries']:>4} q "
+                f"p50 {result['p50_ms']:>8.2f} ms "
+                f"p95 {result['p95_ms']:>8.2f} ms "
+                f"{result['peak_memory_kb']:>9.1f} KiB"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Saved to {options['output']}"))
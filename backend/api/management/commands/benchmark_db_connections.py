@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from api.benchmark import measure_connection_setup
+
+
+class Command(BaseCommand):
+    help = (
+        "Показывает, сколько времени на запрос экономят постоянные "
+        "соединения с БД по сравнению с новым соединением на запрос."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=100)
+
+    def handle(self, *args, **options):
+        result = measure_connection_setup(requests=options["requests"])
+        settings_dict = connection.settings_dict
+        self.stdout.write(
+            f"{result['vendor']}: CONN_MAX_AGE="
+            f"{settings_dict['CONN_MAX_AGE']}, "
+            f"CONN_HEALTH_CHECKS={settings_dict['CONN_HEALTH_CHECKS']}"
+        )
+        self.stdout.write(
+            f"новое соединение   {result['fresh_connection_ms']:>8.3f} ms "
+            f"(p95 {result['fresh_p95_ms']:.3f})"
+        )
+        self.stdout.write(
+            f"постоянное         {result['persistent_connection_ms']:>8.3f} "
+            f"ms (p95 {result['persistent_p95_ms']:.3f})"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"экономия на запрос {result['saved_per_request_ms']:>8.3f} ms"
+            )
+        )
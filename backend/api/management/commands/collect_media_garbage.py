@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from api.constants import MEDIA_GC_MIN_AGE_MINUTES
+from api.images import collect_media_garbage
+
+
+class Command(BaseCommand):
+    help = (
+        "Удаляет файлы медиахранилища, на которые не ссылаются "
+        "рецепты и аватары."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--min-age",
+            type=int,
+            default=MEDIA_GC_MIN_AGE_MINUTES,
+            help="Не удалять файлы моложе указанного числа минут.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только показать файлы, которые будут удалены.",
+        )
+
+    def handle(self, *args, **options):
+        removed = collect_media_garbage(
+            options["min_age"], dry_run=options["dry_run"]
+        )
+        for name in removed:
+            self.stdout.write(name)
+        self.stdout.write(f"Удалено файлов: {len(removed)}")
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from api.similarity_utils import recompute_similar_recipes
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает похожие рецепты для рецептов, у которых изменились "
+        "ингредиенты или теги."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Пересчитать похожие рецепты для всех рецептов.",
+        )
+
+    def handle(self, *args, **options):
+        total = recompute_similar_recipes(full=options["all"])
+        self.stdout.write(f"Обработано рецептов: {total}")
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.feed_utils import rebuild_feeds
+
+
+class Command(BaseCommand):
+    help = "Пересобирает ленты подписок всех пользователей."
+
+    def handle(self, *args, **options):
+        total = rebuild_feeds()
+        self.stdout.write(f"Записей в лентах: {total}")
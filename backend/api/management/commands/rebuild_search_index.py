@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.search_utils import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Пересобирает полнотекстовый индекс рецептов."
+
+    def handle(self, *args, **options):
+        total = rebuild_search_index()
+        self.stdout.write(f"Проиндексировано рецептов: {total}")
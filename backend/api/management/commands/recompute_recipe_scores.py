@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.ranking_utils import recompute_scores
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает затухающие рейтинги популярности рецептов "
+        "для сортировок popular и trending."
+    )
+
+    def handle(self, *args, **options):
+        updated = recompute_scores()
+        self.stdout.write(f"Обновлено рецептов: {updated}")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from users.user_utils import recount_counters
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает счетчики рецептов, подписчиков, избранного "
+        "и корзины покупок и исправляет расхождения."
+    )
+
+    def handle(self, *args, **options):
+        for counter, repaired in recount_counters().items():
+            self.stdout.write(f"{counter}: исправлено строк {repaired}")
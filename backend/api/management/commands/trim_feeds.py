@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from api.constants import FEED_TIMELINE_LENGTH
+from api.feed_utils import trim_timelines
+
+
+class Command(BaseCommand):
+    help = "Обрезает ленты подписок до заданного числа последних записей."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--length",
+            type=int,
+            default=FEED_TIMELINE_LENGTH,
+            help="Сколько последних записей оставить в каждой ленте.",
+        )
+
+    def handle(self, *args, **options):
+        removed = trim_timelines(options["length"])
+        self.stdout.write(f"Удалено записей лент: {removed}")
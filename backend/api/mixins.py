@@ -0,0 +1,88 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date, quote_etag
+
+from api.cache_utils import get_versions
+
+REFERENCE_STATS = {"max_id": Max("id"), "count": Count("id")}
+
+
+def reference_version_tokens(stats):
+    """Токены справочника: добавление и удаление строк меняют ETag."""
+    return (stats["max_id"], stats["count"])
+
+
+def version_validators(request, versions, tokens=()):
+    """ETag и Last-Modified для ответа по версиям и токенам данных."""
+    fingerprint = repr(
+        (versions, tuple(tokens), request.user.pk, request.get_full_path())
+    )
+    etag = quote_etag(hashlib.md5(fingerprint.encode()).hexdigest())
+    return etag, int(max(versions))
+
+
+def patch_validator_headers(
+    response, etag, last_modified, private=False, max_age=0
+):
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    if private:
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ("Authorization",))
+    else:
+        patch_cache_control(response, public=True, max_age=max_age)
+    return response
+
+
+class ConditionalGetMixin:
+    """Отдает ETag и Last-Modified и отвечает 304 без сериализации."""
+
+    cache_max_age = 0
+    cache_private = False
+
+    def get_version_namespaces(self):
+        """Пространства имен версий для текущего действия или None."""
+        return None
+
+    def get_version_tokens(self):
+        return ()
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        namespaces = self.get_version_namespaces()
+        if namespaces is None:
+            return handler(request, *args, **kwargs)
+        etag, last_modified = version_validators(
+            request,
+            get_versions(*namespaces),
+            self.get_version_tokens(),
+        )
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        return patch_validator_headers(
+            response,
+            etag,
+            last_modified,
+            private=self.cache_private,
+            max_age=self.cache_max_age,
+        )
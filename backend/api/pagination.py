@@ -1,10 +1,51 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from api.constants import RECIPE_ORDERINGS
+
+KEYSET_FIELDS = ("pub_date", "id")
+
+
+def keyset_filter(queryset, position, reverse=False, fields=KEYSET_FIELDS):
+    """Строки после позиции по ключу ``fields`` в порядке убывания.
+
+    При ``reverse`` строки идут в обратном порядке, то есть к началу.
+    """
+    lookup = "gt" if reverse else "lt"
+    if position is not None:
+        condition, equal = Q(), {}
+        for field, value in zip(fields, position):
+            condition |= Q(**equal, **{f"{field}__{lookup}": value})
+            equal[field] = value
+        queryset = queryset.filter(condition)
+    prefix = "" if reverse else "-"
+    return queryset.order_by(*(prefix + field for field in fields))
 
 
 class FoodgramRecipePagination(PageNumberPagination):
+    """Постраничная пагинация с опциональным режимом курсора.
+
+    Режим курсора включается параметром ``cursor`` (пустым для первой
+    страницы) и листает ленту по ключу ``(pub_date, id)`` без OFFSET и
+    без подсчета общего количества. При сортировке по рейтингу ключ
+    начинается с поля рейтинга. Размер курсорной страницы ограничен
+    ``max_page_size``.
+    """
+
     page_size_query_param = "limit"
     page_query_param = "page"
     max_page_size = 20
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Неверный курсор."
 
     def get_page_size(self, request):
         try:
@@ -15,3 +56,118 @@ class FoodgramRecipePagination(PageNumberPagination):
             )
         except (KeyError, ValueError, TypeError):
             return self.page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+        return self.paginate_keyset(queryset, request)
+
+    def get_keyset_fields(self, request):
+        score = RECIPE_ORDERINGS.get(request.query_params.get("ordering"))
+        return (score, *KEYSET_FIELDS) if score else KEYSET_FIELDS
+
+    def paginate_keyset(self, queryset, request):
+        fields = self.get_keyset_fields(request)
+
+        def fetch(position, reverse, limit):
+            recipes = keyset_filter(queryset, position, reverse, fields)
+            return [
+                (tuple(getattr(recipe, field) for field in fields), recipe)
+                for recipe in recipes[:limit]
+            ]
+
+        return self.paginate_by_key(request, fetch, len(fields))
+
+    def paginate_by_key(self, request, fetch, key_length=2):
+        """Курсорная страница по ключу ``(..., дата, id)``.
+
+        ``fetch(position, reverse, limit)`` возвращает до ``limit`` пар
+        (ключ, элемент) после позиции в нужном порядке. Перед датой в
+        ключе могут идти числовые поля рейтинга.
+        """
+        self.cursor_mode = True
+        self.base_url = remove_query_param(
+            request.build_absolute_uri(), self.page_query_param
+        )
+        page_size = min(
+            max(self.get_page_size(request), 1), self.max_page_size
+        )
+        token = request.query_params.get(self.cursor_query_param)
+        position, reverse = None, False
+        if token:
+            position, reverse = self.decode_cursor(token, key_length)
+
+        results = list(fetch(position, reverse, page_size + 1))
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, bool(token)
+
+        self.next_cursor = (
+            self.encode_cursor(results[-1][0], reverse=False)
+            if has_next and results
+            else None
+        )
+        self.previous_cursor = (
+            self.encode_cursor(results[0][0], reverse=True)
+            if has_previous and results
+            else None
+        )
+        return [item for _, item in results]
+
+    def encode_cursor(self, key, reverse):
+        *scores, pub_date, pk = key
+        payload = json.dumps([*scores, pub_date.isoformat(), pk, reverse])
+        token = base64.urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, token
+        )
+
+    def decode_cursor(self, token, key_length=2):
+        try:
+            payload = base64.urlsafe_b64decode(token.encode())
+            *scores, pub_date, pk, reverse = json.loads(payload)
+            scores = [float(score) for score in scores]
+            pub_date = parse_datetime(pub_date)
+            pk = int(pk)
+        except (
+            binascii.Error,
+            TypeError,
+            ValueError,
+            UnicodeDecodeError,
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        if (
+            pub_date is None
+            or len(scores) != key_length - 2
+            or not 0 < pk < 2**63
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        return (*scores, pub_date, pk), bool(reverse)
+
+    def get_next_link(self):
+        if self.cursor_mode:
+            return self.next_cursor
+        return super().get_next_link()
+
+    def get_previous_link(self):
+        if self.cursor_mode:
+            return self.previous_cursor
+        return super().get_previous_link()
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
@@ -0,0 +1,150 @@
+import heapq
+import threading
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+
+from api.constants import (
+    PANTRY_BUILD_CHUNK_SIZE,
+    PANTRY_LOG_LENGTH,
+    PANTRY_MAX_CHANGES,
+    PANTRY_SYNC_OVERLAP,
+)
+from recipes.models import PantryChange, RecipeIngredientAmount
+
+
+def record_pantry_changes(recipe_ids):
+    """Записывает изменившиеся рецепты в журнал для всех копий индекса.
+
+    Запись идет в текущей транзакции и становится видна вместе с самим
+    изменением. Журнал хранит последние ``PANTRY_LOG_LENGTH`` записей.
+    """
+    changes = PantryChange.objects.bulk_create(
+        PantryChange(recipe_id=recipe_id) for recipe_id in recipe_ids
+    )
+    if changes and changes[-1].pk is not None:
+        PantryChange.objects.filter(
+            pk__lte=changes[-1].pk - PANTRY_LOG_LENGTH
+        ).delete()
+
+
+class PantryIndex:
+    """Обратный индекс: ингредиент -> отсортированный массив id рецептов.
+
+    Индекс живет в памяти процесса. Перед запросом он догоняет журнал
+    изменений в БД и перечитывает только изменившиеся рецепты; если
+    журнал откатился назад, потерян или слишком длинный, индекс
+    собирается заново.
+
+    Номера записей выдаются до фиксации транзакций, поэтому запись с
+    меньшим номером может появиться позже. Чтобы ее не пропустить,
+    последние ``PANTRY_SYNC_OVERLAP`` номеров перечитываются повторно,
+    а уже примененные из них запоминаются.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sequence = None
+        self._seen = set()
+        self._postings = {}
+        self._recipes = {}
+
+    def _build(self):
+        recent = list(
+            PantryChange.objects.order_by("-pk").values_list(
+                "pk", flat=True
+            )[:PANTRY_SYNC_OVERLAP]
+        )
+        postings = defaultdict(lambda: array("I"))
+        recipes = defaultdict(list)
+        rows = (
+            RecipeIngredientAmount.objects.order_by(
+                "ingredient_id", "recipe_id"
+            )
+            .values_list("ingredient_id", "recipe_id")
+            .iterator(chunk_size=PANTRY_BUILD_CHUNK_SIZE)
+        )
+        for ingredient_id, recipe_id in rows:
+            postings[ingredient_id].append(recipe_id)
+            recipes[recipe_id].append(ingredient_id)
+        self._postings = dict(postings)
+        self._recipes = {
+            recipe_id: tuple(ingredients)
+            for recipe_id, ingredients in recipes.items()
+        }
+        self._sequence = recent[0] if recent else 0
+        self._seen = set(recent)
+
+    def _reload(self, recipe_ids):
+        current = defaultdict(list)
+        for recipe_id, ingredient_id in RecipeIngredientAmount.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list("recipe_id", "ingredient_id"):
+            current[recipe_id].append(ingredient_id)
+        for recipe_id in recipe_ids:
+            for ingredient_id in self._recipes.pop(recipe_id, ()):
+                posting = self._postings[ingredient_id]
+                del posting[bisect_left(posting, recipe_id)]
+            if recipe_id not in current:
+                continue
+            for ingredient_id in current[recipe_id]:
+                insort(
+                    self._postings.setdefault(ingredient_id, array("I")),
+                    recipe_id,
+                )
+            self._recipes[recipe_id] = tuple(current[recipe_id])
+
+    def _sync(self):
+        if self._sequence is None:
+            self._build()
+            return
+        limit = PANTRY_MAX_CHANGES + PANTRY_SYNC_OVERLAP
+        changes = list(
+            PantryChange.objects.filter(
+                pk__gt=self._sequence - PANTRY_SYNC_OVERLAP
+            ).values_list("pk", "recipe_id")[:limit]
+        )
+        last = changes[-1][0] if changes else 0
+        if last < self._sequence or len(changes) == limit:
+            self._build()
+            return
+        unseen = {
+            recipe_id for pk, recipe_id in changes if pk not in self._seen
+        }
+        if unseen:
+            self._reload(unseen)
+        self._sequence = last
+        self._seen = {
+            pk for pk, _ in changes if pk > last - PANTRY_SYNC_OVERLAP
+        }
+
+    def top(self, ingredient_ids, limit):
+        """До ``limit`` рецептов с наибольшей долей имеющихся ингредиентов.
+
+        Возвращает тройки (id рецепта, найдено ингредиентов, всего
+        ингредиентов) по убыванию доли, затем числа совпадений.
+        """
+        with self._lock:
+            self._sync()
+            matched = Counter()
+            for ingredient_id in set(ingredient_ids):
+                matched.update(self._postings.get(ingredient_id, ()))
+            sizes = {
+                recipe_id: len(self._recipes[recipe_id])
+                for recipe_id in matched
+            }
+        best = heapq.nlargest(
+            limit,
+            matched.items(),
+            key=lambda item: (
+                item[1] / sizes[item[0]],
+                item[1],
+                item[0],
+            ),
+        )
+        return [
+            (recipe_id, count, sizes[recipe_id]) for recipe_id, count in best
+        ]
+
+
+pantry_index = PantryIndex()
@@ -0,0 +1,89 @@
+from django.db import transaction
+from django.db.models import (
+    Case,
+    Exists,
+    F,
+    FloatField,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import GreaterThanOrEqual
+from django.utils import timezone
+
+from api.constants import SCORE_HALF_LIFE_HOURS, SCORE_MIN_VALUE, SCORE_WEIGHTS
+from recipes.models import Recipe, RecipeScoring
+from users.models import RecipeInteraction
+
+
+def new_interactions(since, until):
+    """Первые добавления рецепта в избранное и корзину за ``(since, until]``.
+
+    Без ``since`` учитываются все добавления до ``until``.
+    """
+    interactions = RecipeInteraction.objects.filter(
+        recipe=OuterRef("pk"), created_at__lte=until
+    )
+    if since is not None:
+        interactions = interactions.filter(created_at__gt=since)
+    return interactions
+
+
+def interaction_weight():
+    return Case(
+        *(
+            When(kind=kind, then=Value(weight))
+            for kind, weight in SCORE_WEIGHTS.items()
+        ),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+@transaction.atomic
+def recompute_scores(now=None):
+    """Затухающие рейтинги рецептов одним UPDATE.
+
+    Каждый рейтинг умножается на коэффициент затухания за время с
+    прошлого запуска, после чего к нему прибавляются первые добавления
+    рецепта в избранное и корзину, сделанные после прошлого запуска.
+    Повторное добавление после удаления рейтинг не увеличивает. Время
+    запуска хранится в БД и фиксируется вместе с рейтингами.
+    Возвращает число обновленных рецептов.
+    """
+    now = timezone.now() if now is None else now
+    RecipeScoring.objects.get_or_create(pk=1)
+    scoring = RecipeScoring.objects.select_for_update().get(pk=1)
+    elapsed_hours = 0
+    if scoring.scored_at is not None:
+        elapsed_hours = max((now - scoring.scored_at).total_seconds(), 0)
+        elapsed_hours /= 3600
+    interactions = new_interactions(scoring.scored_at, now)
+    fresh = Coalesce(
+        Subquery(
+            interactions.order_by()
+            .values("recipe")
+            .annotate(total=Sum(interaction_weight()))
+            .values("total")
+        ),
+        Value(0.0),
+    )
+    scores = {}
+    for field, half_life in SCORE_HALF_LIFE_HOURS.items():
+        decayed = F(field) * Value(0.5 ** (elapsed_hours / half_life)) + fresh
+        scores[field] = Case(
+            When(GreaterThanOrEqual(decayed, SCORE_MIN_VALUE), then=decayed),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+    active = Q(Exists(interactions))
+    for field in SCORE_HALF_LIFE_HOURS:
+        active |= Q(**{f"{field}__gt": 0})
+    updated = Recipe.objects.filter(active).update(**scores)
+    scoring.scored_at = now
+    scoring.save(update_fields=["scored_at"])
+    return updated
@@ -1,26 +1,211 @@
-from django.shortcuts import get_object_or_404, redirect
+import csv
+import json
 
-from ingredients.models import Ingredient
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef, Prefetch, Sum, Value
+from django.http import Http404
+from django.shortcuts import redirect
+
+from api.cache_utils import cache_key
+from api.constants import SHOPPING_LIST_CHUNK_SIZE, SHORT_LINK_CACHE_TIMEOUT
 from recipes.models import Recipe, RecipeIngredientAmount
+from tags.models import Tag
+from users.models import Subscription
+
+User = get_user_model()
+
+
+def prefetch_recipe_relations(queryset):
+    """Подгружает автора, теги и ингредиенты рецептов заранее.
+
+    Поисковый вектор нужен только поиску, поэтому не загружается.
+    """
+    return (
+        queryset.defer("search_vector")
+        .select_related("author")
+        .prefetch_related(
+            Prefetch(
+                "recipe_ingredients",
+                queryset=RecipeIngredientAmount.objects.select_related(
+                    "ingredient"
+                ),
+            ),
+            Prefetch("tags", queryset=Tag.objects.all()),
+        )
+    )
+
+
+def update_recipe_ingredients(recipe, ingredients_data):
+    """Применяет к ингредиентам рецепта только изменившиеся строки."""
+    current = {
+        item.ingredient_id: item for item in recipe.recipe_ingredients.all()
+    }
+    submitted = {data["ingredient"].id: data for data in ingredients_data}
+    stale = [
+        item.pk
+        for ingredient_id, item in current.items()
+        if ingredient_id not in submitted
+    ]
+    changed = []
+    for ingredient_id, item in current.items():
+        data = submitted.get(ingredient_id)
+        if data is not None and item.amount != data["amount"]:
+            item.amount = data["amount"]
+            changed.append(item)
+    added = [
+        data
+        for ingredient_id, data in submitted.items()
+        if ingredient_id not in current
+    ]
+    if stale:
+        RecipeIngredientAmount.objects.filter(pk__in=stale).delete()
+    if changed:
+        RecipeIngredientAmount.objects.bulk_update(changed, ("amount",))
+    if added:
+        create_recipe_ingredients(recipe, added)
+    return bool(stale or changed or added)
+
+
+def update_recipe_tags(recipe, tags):
+    current = {tag.id for tag in recipe.tags.all()}
+    submitted = {tag.id for tag in tags}
+    if current - submitted:
+        recipe.tags.remove(*(current - submitted))
+    if submitted - current:
+        recipe.tags.add(*(submitted - current))
+    return current != submitted
+
+
+def recipe_version_namespaces(recipe_id, author_id, user):
+    """Пространства версий, от которых зависит карточка рецепта."""
+    return (
+        f"recipe:{recipe_id}",
+        f"user:{author_id}",
+        f"user:{user.pk}",
+        "tags",
+        "ingredients",
+    )
+
+
+def annotate_user_flags(queryset, user):
+    """Аннотирует рецепты флагами избранного, корзины и подписки."""
+    if user.is_anonymous:
+        return queryset.annotate(
+            is_favorited=Value(False),
+            is_in_shopping_cart=Value(False),
+            is_author_subscribed=Value(False),
+        )
+    return queryset.annotate(
+        is_favorited=Exists(
+            User.is_favorited.through.objects.filter(
+                foodgramuser=user, recipe=OuterRef("pk")
+            )
+        ),
+        is_in_shopping_cart=Exists(
+            User.is_in_shopping_cart.through.objects.filter(
+                foodgramuser=user, recipe=OuterRef("pk")
+            )
+        ),
+        is_author_subscribed=Exists(
+            Subscription.objects.filter(
+                subscriber=user, author=OuterRef("author")
+            )
+        ),
+    )
 
 
 def create_recipe_ingredients(recipe, ingredients_data):
-    objects = []
-    for ingredient_data in ingredients_data:
-        ingredient_id = ingredient_data["ingredient"]["id"]
-        amount = ingredient_data["amount"]
-        ingredient_instance = Ingredient.objects.get(id=ingredient_id)
-        objects.append(
-            RecipeIngredientAmount(
-                recipe=recipe,
-                ingredient=ingredient_instance,
-                amount=amount,
+    RecipeIngredientAmount.objects.bulk_create(
+        RecipeIngredientAmount(
+            recipe=recipe,
+            ingredient=ingredient_data["ingredient"],
+            amount=ingredient_data["amount"],
+        )
+        for ingredient_data in ingredients_data
+    )
+
+
+def shopping_list_totals(user):
+    return (
+        RecipeIngredientAmount.objects.filter(recipe__shopping_cart=user)
+        .values("ingredient__name", "ingredient__measurement_unit")
+        .annotate(total_amount=Sum("amount"))
+        .order_by("ingredient__name", "ingredient__measurement_unit")
+    )
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def stream_shopping_list(totals, file_format):
+    """Построчно отдает список покупок в формате txt, csv или json."""
+    rows = totals.iterator(chunk_size=SHOPPING_LIST_CHUNK_SIZE)
+    if file_format == "csv":
+        writer = csv.writer(_Echo())
+        yield writer.writerow(
+            ("Ингредиент", "Количество", "Единица измерения")
+        )
+        for row in rows:
+            yield writer.writerow(
+                (
+                    row["ingredient__name"],
+                    row["total_amount"],
+                    row["ingredient__measurement_unit"],
+                )
+            )
+    elif file_format == "json":
+        separator = "["
+        for row in rows:
+            yield separator + json.dumps(
+                {
+                    "name": row["ingredient__name"],
+                    "amount": row["total_amount"],
+                    "measurement_unit": row["ingredient__measurement_unit"],
+                },
+                ensure_ascii=False,
             )
+            separator = ","
+        yield "]" if separator == "," else "[]"
+    else:
+        for row in rows:
+            yield (
+                f"{row['ingredient__name']}: {row['total_amount']} "
+                f"{row['ingredient__measurement_unit']}\n"
+            )
+
+
+def short_link_key(slug):
+    return cache_key("short-link", slug)
+
+
+def remember_short_link(slug, recipe_id):
+    cache.set(short_link_key(slug), recipe_id, SHORT_LINK_CACHE_TIMEOUT)
+
+
+def forget_short_link(slug):
+    cache.delete(short_link_key(slug))
+
+
+def recipe_id_by_slug(slug):
+    """Id рецепта по короткой ссылке; в общем кеше хранится пара слаг-id."""
+    recipe_id = cache.get(short_link_key(slug))
+    if recipe_id is None:
+        recipe_id = (
+            Recipe.objects.filter(slug=slug)
+            .values_list("id", flat=True)
+            .first()
         )
-    RecipeIngredientAmount.objects.bulk_create(objects)
+        if recipe_id is not None:
+            remember_short_link(slug, recipe_id)
+    return recipe_id
 
 
 def redirect_short_link(request, code):
-    recipe = get_object_or_404(Recipe, slug=code)
-    url = request.build_absolute_uri(f"/recipes/{recipe.id}/")
+    recipe_id = recipe_id_by_slug(code)
+    if recipe_id is None:
+        raise Http404
+    url = request.build_absolute_uri(f"/recipes/{recipe_id}/")
     return redirect(url)
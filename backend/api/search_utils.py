@@ -0,0 +1,140 @@
+import re
+
+from django.db import connection
+from django.db.models import F, FloatField, OuterRef, Subquery
+from django.db.models.expressions import RawSQL
+
+from api.constants import (
+    SEARCH_CONFIG,
+    SEARCH_FTS_TABLE,
+    SEARCH_FTS_WEIGHTS,
+    SEARCH_INDEX_BATCH_SIZE,
+    SEARCH_MAX_TERMS,
+    SEARCH_STEM_MIN_LENGTH,
+    SEARCH_WEIGHTS,
+)
+from ingredients.models import Ingredient
+from recipes.models import Recipe, RecipeIngredientAmount
+
+
+def _postgres_search_vector():
+    from django.contrib.postgres.aggregates import StringAgg
+    from django.contrib.postgres.search import SearchVector
+
+    ingredient_names = Subquery(
+        RecipeIngredientAmount.objects.filter(recipe=OuterRef("pk"))
+        .values("recipe")
+        .annotate(names=StringAgg("ingredient__name", " "))
+        .values("names")
+    )
+    name_weight, ingredients_weight, text_weight = SEARCH_WEIGHTS
+    return (
+        SearchVector("name", weight=name_weight, config=SEARCH_CONFIG)
+        + SearchVector(
+            ingredient_names, weight=ingredients_weight, config=SEARCH_CONFIG
+        )
+        + SearchVector("text", weight=text_weight, config=SEARCH_CONFIG)
+    )
+
+
+def _sqlite_reindex(recipe_ids):
+    recipe_ids = list(recipe_ids)
+    placeholders = ", ".join("%s" for _ in recipe_ids)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {SEARCH_FTS_TABLE} WHERE rowid IN ({placeholders})",
+            recipe_ids,
+        )
+        cursor.execute(
+            f"INSERT INTO {SEARCH_FTS_TABLE} (rowid, name, ingredients, text) "
+            f"SELECT r.id, r.name, (SELECT group_concat(i.name, ' ') "
+            f"FROM {RecipeIngredientAmount._meta.db_table} a "
+            f"JOIN {Ingredient._meta.db_table} i ON i.id = a.ingredient_id "
+            f"WHERE a.recipe_id = r.id), r.text "
+            f"FROM {Recipe._meta.db_table} r WHERE r.id IN ({placeholders})",
+            recipe_ids,
+        )
+
+
+def update_search_index(recipe_ids):
+    """Пересчитывает поисковый индекс для переданных рецептов.
+
+    Удаленные рецепты просто пропадают из индекса.
+    """
+    if not recipe_ids:
+        return
+    if connection.vendor == "postgresql":
+        Recipe.objects.filter(pk__in=recipe_ids).update(
+            search_vector=_postgres_search_vector()
+        )
+    elif connection.vendor == "sqlite":
+        _sqlite_reindex(recipe_ids)
+
+
+def rebuild_search_index():
+    """Пересобирает индекс для всех рецептов пачками; возвращает их число."""
+    recipe_ids = Recipe.objects.order_by("pk").values_list("pk", flat=True)
+    total = 0
+    batch = []
+    for recipe_id in recipe_ids.iterator():
+        batch.append(recipe_id)
+        if len(batch) == SEARCH_INDEX_BATCH_SIZE:
+            update_search_index(batch)
+            total += len(batch)
+            batch = []
+    update_search_index(batch)
+    return total + len(batch)
+
+
+def _fts5_query(query):
+    """Запрос FTS5 из слов пользователя.
+
+    В SQLite нет русского стеммера, поэтому у длинных слов отрезается
+    окончание и ищется префикс: «пирога» находит «пирог» и «пироги».
+    """
+    terms = re.findall(r"\w+", query.lower())[:SEARCH_MAX_TERMS]
+    prefixes = []
+    for term in terms:
+        if len(term) > SEARCH_STEM_MIN_LENGTH:
+            term = term[: max(SEARCH_STEM_MIN_LENGTH, len(term) - 2)]
+        prefixes.append(f'"{term}"*')
+    return " ".join(prefixes)
+
+
+def search_recipes(queryset, query):
+    """Фильтрует рецепты по запросу и сортирует по релевантности."""
+    if connection.vendor == "postgresql":
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        search_query = SearchQuery(
+            query, config=SEARCH_CONFIG, search_type="websearch"
+        )
+        return (
+            queryset.filter(search_vector=search_query)
+            .annotate(search_rank=SearchRank(F("search_vector"), search_query))
+            .order_by("-search_rank", "-pub_date", "-id")
+        )
+    if connection.vendor == "sqlite":
+        fts_query = _fts5_query(query)
+        if not fts_query:
+            return queryset.none()
+        table = Recipe._meta.db_table
+        weights = ", ".join(str(weight) for weight in SEARCH_FTS_WEIGHTS)
+        matches = RawSQL(
+            f"SELECT rowid FROM {SEARCH_FTS_TABLE} "
+            f"WHERE {SEARCH_FTS_TABLE} MATCH %s",
+            (fts_query,),
+        )
+        rank = RawSQL(
+            f"SELECT -bm25({SEARCH_FTS_TABLE}, {weights}) "
+            f"FROM {SEARCH_FTS_TABLE} WHERE {SEARCH_FTS_TABLE} MATCH %s "
+            f'AND {SEARCH_FTS_TABLE}.rowid = "{table}"."id"',
+            (fts_query,),
+            output_field=FloatField(),
+        )
+        return (
+            queryset.filter(id__in=matches)
+            .annotate(search_rank=rank)
+            .order_by("-search_rank", "-pub_date", "-id")
+        )
+    return queryset.filter(name__icontains=query)
@@ -1,12 +1,27 @@
-import base64
-
 from django.contrib.auth import authenticate, get_user_model
-from django.core.files.base import ContentFile
+from django.db import transaction
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
 from api import constants as api_c
-from api.recipe_utils import create_recipe_ingredients
+from api.cache_utils import invalidate
+from api.fields import BulkPrimaryKeyRelatedField, resolve_in_bulk
+from api.images import (
+    ImageUploadError,
+    check_image,
+    decode_base64_image,
+    variant_url,
+    variant_urls,
+)
+from api.pantry_utils import record_pantry_changes
+from api.recipe_utils import (
+    create_recipe_ingredients,
+    update_recipe_ingredients,
+    update_recipe_tags,
+)
+from api.search_utils import update_search_index
+from api.similarity_utils import mark_similarity_stale
+from api.tag_utils import resolve_tags
 from ingredients.models import Ingredient
 from recipes.models import Recipe, RecipeIngredientAmount, RecipeTags
 from tags.models import Tag
@@ -16,14 +31,24 @@ User = get_user_model()
 
 
 class Base64ImageField(serializers.ImageField):
-    def to_internal_value(self, data):
-        if isinstance(data, str) and data.startswith("data:image"):
-            format, imgstr = data.split(";base64,")
-            ext = format.split("/")[-1]
+    default_error_messages = {
+        "too_large": (
+            "Стороны изображения не должны превышать {max_side} пикселей."
+        ),
+        "too_big": "Размер изображения не должен превышать {max_size} байт.",
+        "unsupported_type": "Допустимые форматы изображений: {types}.",
+    }
 
-            data = ContentFile(base64.b64decode(imgstr), name="temp." + ext)
-
-        return super().to_internal_value(data)
+    def to_internal_value(self, data):
+        try:
+            if isinstance(data, str) and data.startswith("data:"):
+                data = decode_base64_image(data)
+            # Проверка ImageField из Django копирует файл в память,
+            # поэтому изображение проверяется напрямую через Pillow.
+            file = serializers.FileField.to_internal_value(self, data)
+            return check_image(file)
+        except ImageUploadError as error:
+            self.fail(error.code, **error.params)
 
 
 class UserCreateSerializer(serializers.ModelSerializer):
@@ -59,6 +84,7 @@ class UserCreateSerializer(serializers.ModelSerializer):
 
 class UserSerializer(serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField()
+    avatar_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = User
@@ -70,15 +96,24 @@ class UserSerializer(serializers.ModelSerializer):
             "last_name",
             "is_subscribed",
             "avatar",
+            "avatar_variants",
         ]
 
     def get_is_subscribed(self, author):
+        if hasattr(author, "is_subscribed"):
+            return author.is_subscribed
         request = self.context.get("request")
         user = request.user if request else None
         if request and user.is_authenticated:
             return us.is_subscribed(user, author)
         return False
 
+    def get_avatar_variants(self, user):
+        request = self.context.get("request")
+        if not request:
+            return None
+        return variant_urls(user.avatar, user.avatar_variants, request)
+
 
 class IngredientSerializer(serializers.ModelSerializer):
     class Meta:
@@ -114,13 +149,6 @@ class RecipeIngredientAmountSerializer(serializers.ModelSerializer):
         fields = ("id", "name", "measurement_unit", "amount")
         read_only_fields = ("name", "measurement_unit")
 
-    def validate_id(self, value):
-        if not Ingredient.objects.filter(id=value).exists():
-            raise serializers.ValidationError(
-                f"Ингредиент с id {value} не найден."
-            )
-        return value
-
 
 class RecipeTagsSerializer(serializers.ModelSerializer):
     id = serializers.IntegerField(source="tag.id")
@@ -136,15 +164,18 @@ class RecipeTagsSerializer(serializers.ModelSerializer):
 class RecipeSerializer(serializers.ModelSerializer):
 
     author = UserSerializer(read_only=True)
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = BulkPrimaryKeyRelatedField(
         queryset=Tag.objects.all(),
+        resolver=resolve_tags,
         many=True,
+        error_messages={"does_not_exist": "Теги с id {pk_value} не найдены."},
     )
     ingredients = RecipeIngredientAmountSerializer(
         source="recipe_ingredients", many=True
     )
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
     image = Base64ImageField(
         required=True,
         allow_null=True,
@@ -173,24 +204,36 @@ class RecipeSerializer(serializers.ModelSerializer):
             "is_in_shopping_cart",
             "name",
             "image",
+            "image_variants",
             "text",
             "cooking_time",
         )
         read_only_fields = ("id",)
 
     def to_representation(self, instance):
+        if hasattr(instance, "is_author_subscribed"):
+            instance.author.is_subscribed = instance.is_author_subscribed
         representation = super().to_representation(instance)
         tags_qs = instance.tags.all()
         representation["tags"] = TagSerializer(tags_qs, many=True).data
         return representation
 
+    def get_image_variants(self, recipe):
+        return variant_urls(
+            recipe.image, recipe.image_variants, self.context["request"]
+        )
+
     def get_is_favorited(self, recipe):
+        if hasattr(recipe, "is_favorited"):
+            return recipe.is_favorited
         user = self.context["request"].user
         if user.is_anonymous:
             return False
         return us.has_favorite(user, recipe)
 
     def get_is_in_shopping_cart(self, recipe):
+        if hasattr(recipe, "is_in_shopping_cart"):
+            return recipe.is_in_shopping_cart
         user = self.context.get("request").user
         if user.is_anonymous:
             return False
@@ -202,9 +245,6 @@ class RecipeSerializer(serializers.ModelSerializer):
         tags_ids = [tag.id for tag in tags]
         if len(tags_ids) != len(set(tags_ids)):
             raise ValidationError("Теги должны быть уникальными.")
-        for tag_id in tags_ids:
-            if not Tag.objects.filter(id=tag_id).exists():
-                raise ValidationError(f"Тег с id {tag_id} не найден.")
         return tags
 
     def validate_ingredients(self, ingredients):
@@ -215,36 +255,93 @@ class RecipeSerializer(serializers.ModelSerializer):
         ]
         if len(ingredients_ids) != len(set(ingredients_ids)):
             raise ValidationError("Ингредиенты должны быть уникальными.")
+        found, missing = resolve_in_bulk(
+            Ingredient.objects.in_bulk, ingredients_ids
+        )
+        if missing:
+            raise ValidationError(
+                "Ингредиенты с id "
+                f"{', '.join(str(pk) for pk in missing)} не найдены."
+            )
+        for ingredient in ingredients:
+            ingredient["ingredient"] = found[ingredient["ingredient"]["id"]]
         return super().validate(ingredients)
 
+    @transaction.atomic
     def create(self, validated_data):
         ingredients_data = validated_data.pop("recipe_ingredients")
         tags_data = validated_data.pop("tags")
         recipe = Recipe.objects.create(**validated_data)
         recipe.tags.set(tags_data)
         create_recipe_ingredients(recipe, ingredients_data)
+        update_search_index([recipe.pk])
+        record_pantry_changes([recipe.pk])
+        us.change_counter(User, recipe.author_id, "recipes_count", 1)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         tags_data = validated_data.pop("tags", None)
         ingredients_data = validated_data.pop("recipe_ingredients", None)
-        if not ingredients_data:
+        # При PATCH непереданные теги и ингредиенты остаются прежними.
+        if not ingredients_data and (
+            ingredients_data is not None or not self.partial
+        ):
             raise serializers.ValidationError("Поле ингредиенты обязательно")
-        if not tags_data:
+        if not tags_data and (tags_data is not None or not self.partial):
             raise serializers.ValidationError("Поле теги обязательно")
 
-        instance = super().update(instance, validated_data)
+        changed_fields = [
+            field
+            for field, value in validated_data.items()
+            if getattr(instance, field) != value
+        ]
+        for field in changed_fields:
+            setattr(instance, field, validated_data[field])
+        if changed_fields:
+            instance.save(update_fields=changed_fields)
 
+        tags_changed = ingredients_changed = False
         if tags_data is not None:
-            instance.tags.set(tags_data)
-
+            tags_changed = update_recipe_tags(instance, tags_data)
         if ingredients_data is not None:
-            instance.recipe_ingredients.all().delete()
-            create_recipe_ingredients(instance, ingredients_data)
-
+            ingredients_changed = update_recipe_ingredients(
+                instance, ingredients_data
+            )
+        if tags_changed or ingredients_changed:
+            invalidate(f"recipe:{instance.pk}")
+            mark_similarity_stale([instance.pk])
+        if ingredients_changed or {"name", "text"} & set(changed_fields):
+            update_search_index([instance.pk])
+        if ingredients_changed:
+            record_pantry_changes([instance.pk])
         return instance
 
 
+class PantryRecipeSerializer(RecipeSerializer):
+    coverage = serializers.FloatField(read_only=True)
+    matched_ingredients = serializers.IntegerField(read_only=True)
+
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + (
+            "coverage",
+            "matched_ingredients",
+        )
+
+
+class PantryQuerySerializer(serializers.Serializer):
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=api_c.PANTRY_MAX_INGREDIENTS,
+    )
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=api_c.PANTRY_MAX_LIMIT,
+        default=api_c.PANTRY_DEFAULT_LIMIT,
+    )
+
+
 class RecipeShortSerializer(serializers.ModelSerializer):
     image = serializers.SerializerMethodField()
 
@@ -255,14 +352,19 @@ class RecipeShortSerializer(serializers.ModelSerializer):
     def get_image(self, obj):
         request = self.context.get("request")
         if obj.image and request:
-            return request.build_absolute_uri(obj.image.url)
+            return variant_url(
+                obj.image,
+                obj.image_variants,
+                request,
+                *api_c.SHORT_IMAGE_VARIANT,
+            )
         return None
 
 
 class SubscriptionsSerializer(serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField()
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
+    recipes_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = User
@@ -279,6 +381,8 @@ class SubscriptionsSerializer(serializers.ModelSerializer):
         )
 
     def get_is_subscribed(self, author):
+        if hasattr(author, "is_subscribed"):
+            return author.is_subscribed
         request = self.context.get("request")
         user = request.user if request else None
         if request and user.is_authenticated:
@@ -286,6 +390,10 @@ class SubscriptionsSerializer(serializers.ModelSerializer):
         return False
 
     def get_recipes(self, obj):
+        if hasattr(obj, "latest_recipes"):
+            return RecipeShortSerializer(
+                obj.latest_recipes, many=True, context=self.context
+            ).data
         request = self.context.get("request")
         recipes_limit = (
             request.query_params.get("recipes_limit") if request else None
@@ -297,9 +405,6 @@ class SubscriptionsSerializer(serializers.ModelSerializer):
             recipes_qs, many=True, context=self.context
         ).data
 
-    def get_recipes_count(self, obj):
-        return obj.recipes.count()
-
 
 class AvatarSerializer(serializers.ModelSerializer):
     avatar = Base64ImageField(
@@ -0,0 +1,104 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from api.cache_utils import invalidate
+from api.feed_utils import (
+    backfill_timeline,
+    drop_author_from_timeline,
+    fan_out_recipe,
+)
+from api.images import schedule_variants
+from api.pantry_utils import record_pantry_changes
+from api.recipe_utils import forget_short_link, remember_short_link
+from api.search_utils import update_search_index
+from ingredients.models import Ingredient
+from recipes.models import Recipe, RecipeIngredientAmount, RecipeTags
+from tags.models import Tag
+from users.models import Subscription
+
+User = get_user_model()
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def ingredient_changed(sender, **kwargs):
+    invalidate("ingredients")
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def tag_changed(sender, **kwargs):
+    invalidate("tags")
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def recipe_changed(sender, instance, **kwargs):
+    invalidate(f"recipe:{instance.pk}")
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_short_link_saved(sender, instance, **kwargs):
+    slug, recipe_id = instance.slug, instance.pk
+    transaction.on_commit(lambda: remember_short_link(slug, recipe_id))
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_short_link_deleted(sender, instance, **kwargs):
+    forget_short_link(instance.slug)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_search_deleted(sender, instance, **kwargs):
+    update_search_index([instance.pk])
+    record_pantry_changes([instance.pk])
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_image_saved(sender, instance, **kwargs):
+    schedule_variants(
+        instance, "image", "image_variants", f"recipe:{instance.pk}"
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_published(sender, instance, created, **kwargs):
+    if created:
+        recipe_id = instance.pk
+        transaction.on_commit(lambda: fan_out_recipe(recipe_id))
+
+
+@receiver((post_save, post_delete), sender=RecipeIngredientAmount)
+@receiver((post_save, post_delete), sender=RecipeTags)
+def recipe_relation_changed(sender, instance, **kwargs):
+    invalidate(f"recipe:{instance.recipe_id}")
+
+
+@receiver((post_save, post_delete), sender=User)
+def user_changed(sender, instance, **kwargs):
+    invalidate(f"user:{instance.pk}")
+
+
+@receiver(post_save, sender=User)
+def user_avatar_saved(sender, instance, **kwargs):
+    schedule_variants(
+        instance, "avatar", "avatar_variants", f"user:{instance.pk}"
+    )
+
+
+@receiver((post_save, post_delete), sender=Subscription)
+def subscription_changed(sender, instance, **kwargs):
+    invalidate(f"user:{instance.subscriber_id}")
+
+
+@receiver(post_save, sender=Subscription)
+def subscription_created(sender, instance, created, **kwargs):
+    if created:
+        subscriber_id, author_id = instance.subscriber_id, instance.author_id
+        transaction.on_commit(
+            lambda: backfill_timeline(subscriber_id, author_id)
+        )
+
+
+@receiver(post_delete, sender=Subscription)
+def subscription_deleted(sender, instance, **kwargs):
+    drop_author_from_timeline(instance.subscriber_id, instance.author_id)
@@ -0,0 +1,140 @@
+from django.db import transaction
+
+from api.constants import (
+    SIMILAR_RECIPES_LIMIT,
+    SIMILARITY_BATCH_SIZE,
+    SIMILARITY_TAG_WEIGHT,
+)
+from recipes.models import (
+    Recipe,
+    RecipeIngredientAmount,
+    RecipeNeighbour,
+    RecipeTags,
+)
+
+
+def _chunks(items, size=SIMILARITY_BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def mark_similarity_stale(recipe_ids):
+    Recipe.objects.filter(pk__in=recipe_ids).update(similarity_stale=True)
+
+
+def feature_matrix(recipe_ids):
+    """Нормированные TF-IDF векторы рецептов по ингредиентам и тегам.
+
+    Строка матрицы соответствует рецепту из ``recipe_ids``, столбцы —
+    ингредиентам и тегам. Вес признака равен сглаженному IDF, теги
+    дополнительно умножаются на ``SIMILARITY_TAG_WEIGHT``.
+    """
+    # NumPy и SciPy нужны только пакетному пересчету, поэтому веб-процессы
+    # их не импортируют.
+    import numpy as np
+    from scipy import sparse
+
+    rows = {recipe_id: row for row, recipe_id in enumerate(recipe_ids)}
+    features = {}
+    row_index, column_index, weights = [], [], []
+    sources = (
+        (RecipeIngredientAmount, "ingredient_id", 1.0),
+        (RecipeTags, "tag_id", SIMILARITY_TAG_WEIGHT),
+    )
+    for model, field, weight in sources:
+        pairs = model.objects.order_by().values_list("recipe_id", field)
+        for recipe_id, value in pairs.iterator():
+            if recipe_id not in rows:
+                continue
+            key = (field, value)
+            column = features.setdefault(key, len(features))
+            row_index.append(rows[recipe_id])
+            column_index.append(column)
+            weights.append(weight)
+    matrix = sparse.csr_matrix(
+        (weights, (row_index, column_index)),
+        shape=(len(rows), len(features)),
+        dtype=np.float64,
+    )
+    frequency = np.bincount(matrix.indices, minlength=len(features))
+    idf = np.log((1 + len(rows)) / (1 + frequency)) + 1
+    matrix = sparse.csr_matrix(matrix.multiply(idf))
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.csr_matrix(matrix.multiply(1 / norms[:, None]))
+
+
+def nearest_neighbours(matrix, rows, limit=SIMILAR_RECIPES_LIMIT):
+    """До ``limit`` ближайших строк по косинусному сходству для ``rows``."""
+    import numpy as np
+
+    similarity = (matrix[rows] @ matrix.T).tocsr()
+    for position, row in enumerate(rows):
+        start = similarity.indptr[position]
+        end = similarity.indptr[position + 1]
+        columns = similarity.indices[start:end]
+        scores = similarity.data[start:end]
+        keep = (columns != row) & (scores > 0)
+        columns, scores = columns[keep], scores[keep]
+        if len(scores) > limit:
+            best = np.argpartition(-scores, limit)[:limit]
+            columns, scores = columns[best], scores[best]
+        order = np.lexsort((columns, -scores))
+        yield row, columns[order], scores[order]
+
+
+def recompute_similar_recipes(full=False):
+    """Пересчитывает похожие рецепты и возвращает число обработанных.
+
+    По умолчанию обрабатываются рецепты с флагом ``similarity_stale`` и
+    рецепты, у которых они числятся среди похожих.
+    """
+    if full:
+        targets = list(Recipe.objects.values_list("id", flat=True))
+    else:
+        stale = list(
+            Recipe.objects.filter(similarity_stale=True).values_list(
+                "id", flat=True
+            )
+        )
+        targets = set(stale)
+        for chunk in _chunks(stale):
+            targets.update(
+                RecipeNeighbour.objects.filter(
+                    neighbour_id__in=chunk
+                ).values_list("recipe_id", flat=True)
+            )
+        targets = sorted(targets)
+    if not targets:
+        return 0
+    # Флаг снимается до чтения признаков: правка рецепта во время
+    # пересчета снова его выставит.
+    for chunk in _chunks(targets):
+        Recipe.objects.filter(pk__in=chunk).update(similarity_stale=False)
+    try:
+        recipe_ids = list(
+            Recipe.objects.order_by("id").values_list("id", flat=True)
+        )
+        matrix = feature_matrix(recipe_ids)
+        rows = {recipe_id: row for row, recipe_id in enumerate(recipe_ids)}
+        for chunk in _chunks(targets):
+            chunk_rows = [rows[pk] for pk in chunk if pk in rows]
+            neighbours = [
+                RecipeNeighbour(
+                    recipe_id=recipe_ids[row],
+                    neighbour_id=recipe_ids[column],
+                    score=float(score),
+                )
+                for row, columns, scores in nearest_neighbours(
+                    matrix, chunk_rows
+                )
+                for column, score in zip(columns, scores)
+            ]
+            with transaction.atomic():
+                RecipeNeighbour.objects.filter(recipe_id__in=chunk).delete()
+                RecipeNeighbour.objects.bulk_create(neighbours)
+    except Exception:
+        for chunk in _chunks(targets):
+            mark_similarity_stale(chunk)
+        raise
+    return len(targets)
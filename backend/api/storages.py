@@ -0,0 +1,42 @@
+import hashlib
+import os
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+
+from api.constants import BLOB_DIR
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, где имя файла — sha256 его содержимого.
+
+    Одинаковые файлы сохраняются один раз, а имена никогда не меняют
+    содержимого, поэтому их можно кешировать навсегда. Файлы без ссылок
+    удаляет команда collect_media_garbage, поэтому при повторном
+    сохранении уже существующего файла обновляется время его изменения.
+    """
+
+    def blob_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        digest = digest.hexdigest()
+        ext = os.path.splitext(name)[1].lower()
+        return f"{BLOB_DIR}/{digest[:2]}/{digest}{ext}"
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        name = self.blob_name(name, content)
+        try:
+            # Повторная ссылка на старый файл: обновляем время изменения,
+            # чтобы сборщик мусора не удалил его до фиксации транзакции.
+            os.utime(self.path(name))
+            return name
+        except FileNotFoundError:
+            pass
+        temp_name = super()._save(f"{name}.{uuid.uuid4().hex}.tmp", content)
+        os.replace(self.path(temp_name), self.path(name))
+        return name
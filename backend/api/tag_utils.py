@@ -0,0 +1,16 @@
+from api.cache_utils import LocalVersionedCache
+from tags.models import Tag
+
+tags_by_id = LocalVersionedCache(
+    "tags", lambda: {tag.id: tag for tag in Tag.objects.all()}
+)
+
+
+def resolve_tags(pks):
+    tags = tags_by_id.get()
+    return {pk: tags[pk] for pk in pks if pk in tags}
+
+
+def tag_ids_by_slugs(slugs):
+    slugs = set(slugs)
+    return [tag.id for tag in tags_by_id.get().values() if tag.slug in slugs]
@@ -0,0 +1,457 @@
+import base64
+import importlib
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import clear_url_caches, resolve
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework.throttling import BaseThrottle
+
+from api import urls as api_urls
+from api.async_views import RecipeListView
+from api.cache_utils import version_key
+from api.pagination import FoodgramRecipePagination
+from api.pantry_utils import PantryIndex, record_pantry_changes
+from api.ranking_utils import recompute_scores
+from api.views import RecipeViewSet
+from backend import urls as backend_urls
+from ingredients.models import Ingredient
+from recipes.models import (
+    PantryChange,
+    Recipe,
+    RecipeIngredientAmount,
+    RecipeTags,
+)
+from tags.models import Tag
+from users import user_utils as us
+
+User = get_user_model()
+
+
+@override_settings(IMAGE_WORKERS=0)
+class RecipeAPITestCase(TestCase):
+    """Автор с рецептами и читатель с избранным, корзиной и подпиской."""
+
+    RECIPES = 12
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="reader", email="reader@example.com", password="pass"
+        )
+        cls.author = author = User.objects.create_user(
+            username="author", email="author@example.com", password="pass"
+        )
+        cls.tags = tags = Tag.objects.bulk_create(
+            Tag(name=f"Тег {number}", slug=f"tag{number}")
+            for number in range(3)
+        )
+        cls.ingredients = ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f"Ингредиент {number}", measurement_unit="г")
+            for number in range(4)
+        )
+        cls.recipes = []
+        for number in range(cls.RECIPES):
+            recipe = Recipe.objects.create(
+                author=author,
+                name=f"Рецепт {number}",
+                text="Описание",
+                cooking_time=10,
+                image="recipes/images/recipe.png",
+            )
+            RecipeTags.objects.bulk_create(
+                RecipeTags(recipe=recipe, tag=tag) for tag in tags
+            )
+            RecipeIngredientAmount.objects.bulk_create(
+                RecipeIngredientAmount(
+                    recipe=recipe, ingredient=ingredient, amount=5
+                )
+                for ingredient in ingredients
+            )
+            if number % 2:
+                us.add_favorite(cls.user, recipe)
+                us.add_to_cart(cls.user, recipe)
+            cls.recipes.append(recipe)
+        us.subscribe(cls.user, author)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+class RecipeListQueriesTest(RecipeAPITestCase):
+    """Число запросов списка рецептов не зависит от размера страницы."""
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries), response.data["results"]
+
+    def assert_constant_queries(self, url):
+        small, small_page = self.count_queries(f"{url}&limit=2")
+        large, large_page = self.count_queries(f"{url}&limit={self.RECIPES}")
+        self.assertEqual(len(small_page), 2)
+        self.assertEqual(len(large_page), self.RECIPES)
+        self.assertTrue(any(item["is_favorited"] for item in large_page))
+        self.assertTrue(large_page[0]["author"]["is_subscribed"])
+        self.assertEqual(small, large)
+
+    def test_page_number_list(self):
+        self.assert_constant_queries("/api/recipes/?page=1")
+
+    def test_cursor_list(self):
+        self.assert_constant_queries("/api/recipes/?cursor=")
+
+
+class RecipeUpdateTest(RecipeAPITestCase):
+    """Частичное обновление рецепта."""
+
+    def relations(self, recipe):
+        return (
+            sorted(recipe.tags.values_list("id", flat=True)),
+            sorted(
+                recipe.recipe_ingredients.values_list(
+                    "ingredient_id", "amount"
+                )
+            ),
+        )
+
+    def test_patch_name_keeps_tags_and_ingredients(self):
+        recipe = self.recipes[0]
+        before = self.relations(recipe)
+        self.client.force_authenticate(self.author)
+        response = self.client.patch(
+            f"/api/recipes/{recipe.pk}/", {"name": "Новое имя"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["name"], "Новое имя")
+        self.assertEqual(len(response.data["tags"]), len(self.tags))
+        self.assertEqual(
+            len(response.data["ingredients"]), len(self.ingredients)
+        )
+        self.assertEqual(self.relations(recipe), before)
+
+    def test_patch_empty_ingredients_is_rejected(self):
+        self.client.force_authenticate(self.author)
+        response = self.client.patch(
+            f"/api/recipes/{self.recipes[0].pk}/",
+            {"ingredients": []},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class RecipeCursorPaginationTest(RecipeAPITestCase):
+    """Курсорная пагинация списка рецептов."""
+
+    def walk(self, url, link="next"):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([item["id"] for item in response.data["results"]])
+            url = response.data[link]
+        return pages
+
+    def assert_walks_both_ways(self, url, expected):
+        forward = self.walk(url)
+        ids = [pk for page in forward for pk in page]
+        self.assertEqual(ids, expected)
+        last_page = self.client.get(url).data
+        while last_page["next"]:
+            last_page = self.client.get(last_page["next"]).data
+        backward = self.walk(last_page["previous"], link="previous")
+        self.assertEqual(
+            [pk for page in reversed(backward) for pk in page],
+            ids[: -len(forward[-1])],
+        )
+
+    def test_cursor_over_equal_dates(self):
+        Recipe.objects.update(pub_date=timezone.now())
+        expected = sorted((recipe.pk for recipe in self.recipes), reverse=True)
+        self.assert_walks_both_ways("/api/recipes/?cursor=&limit=5", expected)
+
+    def test_popular_cursor(self):
+        for recipe in self.recipes:
+            Recipe.objects.filter(pk=recipe.pk).update(
+                popularity_score=recipe.pk % 3
+            )
+        expected = [
+            recipe.pk
+            for recipe in Recipe.objects.order_by(
+                "-popularity_score", "-pub_date", "-id"
+            )
+        ]
+        self.assert_walks_both_ways(
+            "/api/recipes/?ordering=popular&cursor=&limit=4", expected
+        )
+
+    def test_invalid_cursor(self):
+        plain = self.client.get("/api/recipes/?cursor=&limit=2").data["next"]
+        plain_token = plain.split("cursor=")[1].split("&")[0]
+        tampered = [
+            "garbage!!",
+            base64.urlsafe_b64encode(b"not json").decode(),
+            base64.urlsafe_b64encode(b'{"id": 1}').decode(),
+            base64.urlsafe_b64encode(b'["yesterday", 1, false]').decode(),
+            base64.urlsafe_b64encode(
+                b'["2024-01-01T00:00:00+00:00", 1e30, false]'
+            ).decode(),
+        ]
+        for token in tampered:
+            with self.subTest(token=token):
+                response = self.client.get(f"/api/recipes/?cursor={token}")
+                self.assertEqual(response.status_code, 404)
+        response = self.client.get(
+            f"/api/recipes/?ordering=popular&cursor={plain_token}"
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_cursor_page_size_is_capped(self):
+        max_page_size = FoodgramRecipePagination.max_page_size
+        for number in range(max_page_size):
+            Recipe.objects.create(
+                author=self.author,
+                name=f"Еще рецепт {number}",
+                text="Описание",
+                cooking_time=10,
+                image="recipes/images/recipe.png",
+            )
+        response = self.client.get("/api/recipes/?cursor=&limit=1000")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), max_page_size)
+        self.assertIsNotNone(response.data["next"])
+
+
+class RecipeETagTest(RecipeAPITestCase):
+    """Карточка рецепта отвечает 304, пока ее данные не изменились."""
+
+    def setUp(self):
+        super().setUp()
+        self.recipe = self.recipes[0]
+        self.url = f"/api/recipes/{self.recipe.pk}/"
+
+    def get_etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("ETag", response)
+        return response["ETag"]
+
+    def assert_changes_etag(self, write):
+        etag = self.get_etag()
+        response = write()
+        if response is not None:
+            self.assertLess(response.status_code, 300)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_repeat_request_is_not_modified(self):
+        etag = self.get_etag()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_favorite_changes_etag(self):
+        self.assert_changes_etag(
+            lambda: self.client.post(f"{self.url}favorite/")
+        )
+
+    def test_subscription_changes_etag(self):
+        self.assert_changes_etag(
+            lambda: self.client.delete(
+                f"/api/users/{self.author.pk}/subscribe/"
+            )
+        )
+
+    def test_author_change_changes_etag(self):
+        def rename_author():
+            self.author.first_name = "Новое имя"
+            self.author.save()
+
+        self.assert_changes_etag(rename_author)
+
+    def test_amount_change_changes_etag(self):
+        def change_amount():
+            amount = self.recipe.recipe_ingredients.first()
+            amount.amount += 1
+            amount.save()
+
+        self.assert_changes_etag(change_amount)
+
+    def test_ingredient_rename_changes_etag(self):
+        def rename_ingredient():
+            ingredient = self.ingredients[0]
+            ingredient.name = "Новый ингредиент"
+            ingredient.save()
+
+        self.assert_changes_etag(rename_ingredient)
+
+    def test_evicted_version_changes_etag(self):
+        def evict_version():
+            cache.delete(version_key(f"recipe:{self.recipe.pk}"))
+
+        self.assert_changes_etag(evict_version)
+
+
+class PantryIndexTest(RecipeAPITestCase):
+    """Индекс кладовой догоняет журнал изменений в БД."""
+
+    def setUp(self):
+        super().setUp()
+        self.index = PantryIndex()
+        self.recipe = self.recipes[0]
+
+    def totals(self):
+        ingredient_ids = [ingredient.pk for ingredient in self.ingredients]
+        return {
+            recipe_id: total
+            for recipe_id, _, total in self.index.top(ingredient_ids, 100)
+        }
+
+    def shrink_recipe(self):
+        self.recipe.recipe_ingredients.exclude(
+            ingredient=self.ingredients[0]
+        ).delete()
+
+    def test_recorded_change_is_applied(self):
+        self.assertEqual(self.totals()[self.recipe.pk], len(self.ingredients))
+        self.shrink_recipe()
+        record_pantry_changes([self.recipe.pk])
+        self.assertEqual(self.totals()[self.recipe.pk], 1)
+
+    def test_late_committed_change_is_applied(self):
+        record_pantry_changes([self.recipes[1].pk])
+        self.totals()
+        last = PantryChange.objects.latest("pk").pk
+        PantryChange.objects.create(pk=last + 5, recipe_id=self.recipes[2].pk)
+        self.totals()
+        self.shrink_recipe()
+        PantryChange.objects.create(pk=last + 2, recipe_id=self.recipe.pk)
+        self.assertEqual(self.totals()[self.recipe.pk], 1)
+
+    def test_truncated_log_rebuilds_index(self):
+        record_pantry_changes([self.recipes[1].pk])
+        self.totals()
+        self.shrink_recipe()
+        PantryChange.objects.all().delete()
+        self.assertEqual(self.totals()[self.recipe.pk], 1)
+
+
+class RecipeScoresTest(RecipeAPITestCase):
+    """Рейтинги растут только от новых добавлений."""
+
+    def popularity(self, recipe):
+        recipe.refresh_from_db()
+        return recipe.popularity_score
+
+    def test_readding_does_not_inflate_score(self):
+        now = timezone.now()
+        recompute_scores(now)
+        recipe = self.recipes[1]
+        self.assertEqual(self.popularity(recipe), 3.0)
+        us.remove_favorite(self.user, recipe)
+        us.add_favorite(self.user, recipe)
+        recompute_scores(now + timedelta(seconds=1))
+        self.assertAlmostEqual(self.popularity(recipe), 3.0, places=3)
+
+    def test_new_favorite_is_counted_once(self):
+        now = timezone.now()
+        recompute_scores(now)
+        recipe = self.recipes[0]
+        us.add_favorite(self.author, recipe)
+        recompute_scores(timezone.now())
+        self.assertAlmostEqual(self.popularity(recipe), 2.0, places=3)
+        recompute_scores(timezone.now())
+        self.assertAlmostEqual(self.popularity(recipe), 2.0, places=3)
+
+
+class DenyAllThrottle(BaseThrottle):
+    def allow_request(self, request, view):
+        return False
+
+
+def reload_urls():
+    importlib.reload(api_urls)
+    importlib.reload(backend_urls)
+    clear_url_caches()
+
+
+class AsyncReadViewsParityTest(RecipeAPITestCase):
+    """Асинхронные представления отвечают так же, как синхронные."""
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(reload_urls)
+        self.anonymous = APIClient()
+        self.bad_token = APIClient()
+        self.bad_token.credentials(HTTP_AUTHORIZATION="Token invalid")
+
+    def requests(self):
+        recipe_id = self.recipes[0].pk
+        return [
+            (self.client, "/api/recipes/?page=1&limit=5"),
+            (self.client, "/api/recipes/?cursor=&limit=5"),
+            (self.client, "/api/recipes/?ordering=popular&cursor=&limit=5"),
+            (self.client, "/api/recipes/?cursor=broken"),
+            (self.client, f"/api/recipes/{recipe_id}/"),
+            (self.client, "/api/recipes/999999/"),
+            (self.client, "/api/tags/"),
+            (self.client, "/api/ingredients/"),
+            (self.client, "/api/ingredients/?name=Ингредиент"),
+            (self.anonymous, "/api/recipes/?limit=5"),
+            (self.anonymous, f"/api/recipes/{recipe_id}/"),
+            (self.bad_token, "/api/recipes/"),
+            (self.bad_token, "/api/tags/"),
+        ]
+
+    def responses(self, async_views, requests=None):
+        with override_settings(ASYNC_READ_VIEWS=async_views):
+            reload_urls()
+            view = resolve("/api/recipes/").func
+            self.assertEqual(
+                getattr(view, "view_class", None) is RecipeListView,
+                async_views,
+            )
+            responses = []
+            for client, url in requests or self.requests():
+                response = client.get(url)
+                responses.append(
+                    (
+                        url,
+                        response.status_code,
+                        response.content,
+                        response.get("ETag"),
+                    )
+                )
+        return responses
+
+    def test_async_responses_match_sync(self):
+        sync_responses = self.responses(async_views=False)
+        async_responses = self.responses(async_views=True)
+        statuses = {status for _, status, _, _ in sync_responses}
+        self.assertTrue({200, 401, 404} <= statuses)
+        for expected, actual in zip(sync_responses, async_responses):
+            with self.subTest(url=expected[0]):
+                self.assertEqual(actual, expected)
+
+    def test_async_views_apply_throttles(self):
+        requests = [
+            (self.client, "/api/recipes/"),
+            (self.client, f"/api/recipes/{self.recipes[0].pk}/"),
+        ]
+        with mock.patch.object(
+            RecipeViewSet, "throttle_classes", (DenyAllThrottle,)
+        ):
+            for async_views in (False, True):
+                responses = self.responses(async_views, requests)
+                for url, status, _, _ in responses:
+                    with self.subTest(url=url, async_views=async_views):
+                        self.assertEqual(status, 429)
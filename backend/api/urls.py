@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import include, path
 from djoser.views import TokenDestroyView
 from rest_framework.routers import DefaultRouter
@@ -64,5 +65,31 @@ auth_patterns = [
 urlpatterns = [
     path("auth/", include(auth_patterns)),
     path("users/", include(user_patterns)),
+]
+
+if settings.ASYNC_READ_VIEWS:
+    from api.async_views import (
+        IngredientListView,
+        RecipeDetailView,
+        RecipeListView,
+        TagListView,
+    )
+
+    urlpatterns += [
+        path("tags/", TagListView.as_view(), name="tag-list"),
+        path(
+            "ingredients/",
+            IngredientListView.as_view(),
+            name="ingredient-list",
+        ),
+        path("recipes/", RecipeListView.as_view(), name="recipe-list"),
+        path(
+            "recipes/<int:id>/",
+            RecipeDetailView.as_view(),
+            name="recipe-detail",
+        ),
+    ]
+
+urlpatterns += [
     path("", include(router.urls)),
 ]
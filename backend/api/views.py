@@ -1,4 +1,6 @@
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import TokenCreateView, UserViewSet
@@ -6,17 +8,37 @@ from rest_framework import mixins, permissions, status, viewsets
 from rest_framework.authtoken.models import Token
 from rest_framework.decorators import action
 from rest_framework.filters import SearchFilter
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 
+from api.constants import REFERENCE_CACHE_MAX_AGE, SIMILAR_RECIPES_LIMIT
+from api.feed_utils import feed_keys
 from api.filters import RecipeFilter
+from api.ingredient_utils import parse_autocomplete_limit, search_ingredients
+from api.mixins import (
+    REFERENCE_STATS,
+    ConditionalGetMixin,
+    reference_version_tokens,
+)
 from api.pagination import FoodgramRecipePagination
+from api.pantry_utils import pantry_index
 from api.permissions import IsAuthorOrReadOnly
+from api.recipe_utils import (
+    annotate_user_flags,
+    prefetch_recipe_relations,
+    recipe_version_namespaces,
+    shopping_list_totals,
+    stream_shopping_list,
+)
+from api.renderers import CSVRenderer, PlainTextRenderer
 from api.serializers import (
     AvatarSerializer,
     CartActionSerializer,
     FavoriteActionSerializer,
     IngredientSerializer,
     LoginSerializer,
+    PantryQuerySerializer,
+    PantryRecipeSerializer,
     RecipeSerializer,
     RecipeShortSerializer,
     SubscriptionActionSerializer,
@@ -24,7 +46,7 @@ from api.serializers import (
     TagSerializer,
 )
 from ingredients.models import Ingredient
-from recipes.models import Recipe, RecipeIngredientAmount
+from recipes.models import Recipe
 from tags.models import Tag
 from users import user_utils as us
 
@@ -49,8 +71,8 @@ class FoodgramUserViewSet(UserViewSet):
     def set_avatar(self, request):
         user = request.user
         if request.method == "DELETE":
-            user.avatar.delete(save=False)
             user.avatar = None
+            user.avatar_variants = {}
             user.save()
             return Response(status=status.HTTP_204_NO_CONTENT)
         serializer = AvatarSerializer(user, data=request.data)
@@ -93,10 +115,11 @@ class SubscriptionViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
     serializer_class = SubscriptionsSerializer
 
     def get_queryset(self):
-        user = self.request.user
-        subscriptions = us.all_subscriptions(user)
-        authors = [sub.author for sub in subscriptions]
-        return authors
+        recipes_limit = self.request.query_params.get("recipes_limit")
+        return us.subscribed_authors(
+            self.request.user,
+            int(recipes_limit) if str(recipes_limit).isdigit() else None,
+        )
 
 
 class FoodgramTokenCreate(TokenCreateView):
@@ -110,30 +133,49 @@ class FoodgramTokenCreate(TokenCreateView):
         return Response({"auth_token": token.key})
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Tag.objects.all()
-    serializer_class = TagSerializer
+class ReferenceDataViewSet(
+    ConditionalGetMixin, viewsets.ReadOnlyModelViewSet
+):
     permission_classes = (permissions.AllowAny,)
     pagination_class = None
+    cache_max_age = REFERENCE_CACHE_MAX_AGE
+    version_namespace = None
+
+    def get_version_namespaces(self):
+        return (self.version_namespace,)
+
+    def get_version_tokens(self):
+        return reference_version_tokens(
+            self.queryset.model.objects.aggregate(**REFERENCE_STATS)
+        )
+
+
+class TagViewSet(ReferenceDataViewSet):
+    queryset = Tag.objects.all()
+    serializer_class = TagSerializer
+    version_namespace = "tags"
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(ReferenceDataViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
-    permission_classes = (permissions.AllowAny,)
     filter_backends = (SearchFilter,)
-    pagination_class = None
     search_fields = ("name",)
+    version_namespace = "ingredients"
 
-    def get_queryset(self):
-        queryset = super().get_queryset()
+    def filter_queryset(self, queryset):
         name = self.request.query_params.get("name")
-        if name:
-            queryset = queryset.filter(name__icontains=name)
-        return queryset
+        if self.action != "list" or not name:
+            return super().filter_queryset(queryset)
+        return search_ingredients(
+            name,
+            limit=parse_autocomplete_limit(
+                self.request.query_params.get("limit")
+            ),
+        )
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     serializer_class = RecipeSerializer
     permission_classes = (IsAuthorOrReadOnly,)
@@ -141,9 +183,39 @@ class RecipeViewSet(viewsets.ModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
     pagination_class = FoodgramRecipePagination
+    cache_private = True
+
+    def get_version_namespaces(self):
+        if self.action != "retrieve":
+            return None
+        recipe_id = self.kwargs[self.lookup_field]
+        author_id = (
+            Recipe.objects.filter(id=recipe_id)
+            .values_list("author_id", flat=True)
+            .first()
+        )
+        if author_id is None:
+            return None
+        return recipe_version_namespaces(
+            recipe_id, author_id, self.request.user
+        )
+
+    def get_queryset(self):
+        queryset = prefetch_recipe_relations(super().get_queryset())
+        return annotate_user_flags(queryset, self.request.user)
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        recipe = serializer.save(author=self.request.user)
+        serializer.instance = self.get_queryset().get(pk=recipe.pk)
+
+    def perform_update(self, serializer):
+        recipe = serializer.save()
+        serializer.instance = self.get_queryset().get(pk=recipe.pk)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+        us.change_counter(User, instance.author_id, "recipes_count", -1)
 
     @action(
         detail=True,
@@ -159,21 +231,88 @@ class RecipeViewSet(viewsets.ModelViewSet):
         )
         serializer.is_valid(raise_exception=True)
         if request.method == "POST":
-            user.is_favorited.add(recipe)
+            us.add_favorite(user, recipe)
             serializer = self.get_serializer(recipe)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         elif request.method == "DELETE":
-            user.is_favorited.remove(recipe)
+            us.remove_favorite(user, recipe)
             return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(
+        detail=False,
+        methods=("get",),
+        permission_classes=(permissions.IsAuthenticated,),
+    )
+    def feed(self, request):
+        """Рецепты авторов из подписок, от новых к старым, по курсору."""
+        queryset = self.get_queryset()
+
+        def fetch(position, reverse, limit):
+            keys = feed_keys(request.user, position, reverse, limit)
+            recipes = queryset.in_bulk([pk for _, pk in keys])
+            return [
+                ((pub_date, pk), recipes[pk])
+                for pub_date, pk in keys
+                if pk in recipes
+            ]
+
+        page = self.paginator.paginate_by_key(request, fetch)
+        serializer = self.get_serializer(page, many=True)
+        return self.paginator.get_paginated_response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=("get",),
+        permission_classes=(permissions.AllowAny,),
+        serializer_class=PantryRecipeSerializer,
+    )
+    def pantry(self, request):
+        """Рецепты, которые можно приготовить из указанных ингредиентов."""
+        query = PantryQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        matches = pantry_index.top(
+            query.validated_data["ingredients"],
+            query.validated_data["limit"],
+        )
+        recipes = self.get_queryset().in_bulk(
+            [recipe_id for recipe_id, _, _ in matches]
+        )
+        results = []
+        for recipe_id, matched, total in matches:
+            recipe = recipes.get(recipe_id)
+            if recipe is None:
+                continue
+            recipe.matched_ingredients = matched
+            recipe.coverage = matched / total
+            results.append(recipe)
+        return Response(self.get_serializer(results, many=True).data)
+
+    @action(
+        detail=True,
+        methods=("get",),
+        permission_classes=(permissions.AllowAny,),
+        serializer_class=RecipeShortSerializer,
+    )
+    def similar(self, request, id=None):
+        """Похожие рецепты из заранее посчитанной таблицы соседей."""
+        recipes = list(
+            Recipe.objects.defer("search_vector")
+            .filter(neighbour_of__recipe_id=id)
+            .order_by("-neighbour_of__score", "id")[:SIMILAR_RECIPES_LIMIT]
+        )
+        if not recipes:
+            get_object_or_404(Recipe.objects.values_list("id"), id=id)
+        return Response(self.get_serializer(recipes, many=True).data)
+
     @action(
         detail=True,
         methods=("get",),
         url_path="get-link",
     )
     def get_link(self, request, id=None):
-        recipe = get_object_or_404(Recipe, id=id)
-        slug = recipe.slug
+        slug = get_object_or_404(
+            Recipe.objects.values_list("slug", flat=True), id=id
+        )
         url = request.build_absolute_uri(f"/r/{slug}/")
         return Response({"short-link": url}, status=status.HTTP_200_OK)
 
@@ -191,12 +330,12 @@ class RecipeViewSet(viewsets.ModelViewSet):
         )
         serializer.is_valid(raise_exception=True)
         if request.method == "POST":
-            user.is_in_shopping_cart.add(recipe)
+            us.add_to_cart(user, recipe)
             serializer = self.get_serializer(recipe)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
         elif request.method == "DELETE":
-            user.is_in_shopping_cart.remove(recipe)
+            us.remove_from_cart(user, recipe)
             return Response(
                 status=status.HTTP_204_NO_CONTENT,
             )
@@ -205,39 +344,22 @@ class RecipeViewSet(viewsets.ModelViewSet):
         detail=False,
         methods=("get",),
         url_path="download_shopping_cart",
+        permission_classes=(permissions.IsAuthenticated,),
+        renderer_classes=(PlainTextRenderer, CSVRenderer, JSONRenderer),
     )
     def download_shopping_cart(self, request):
         user = request.user
-        shopping_cart_items = user.is_in_shopping_cart.all()
-        if not shopping_cart_items.exists():
+        if not us.shopping_cart(user).exists():
             return Response(
                 {"detail": "Ваш список покупок пуст."},
                 status=status.HTTP_404_NOT_FOUND,
             )
-
-        ingredient_amounts = RecipeIngredientAmount.objects.filter(
-            recipe__in=shopping_cart_items
-        ).select_related("ingredient")
-
-        shopping_list = {}
-
-        for item in ingredient_amounts:
-            name = item.ingredient.name
-            if name not in shopping_list:
-                shopping_list[name] = {
-                    "measurement_unit": item.ingredient.measurement_unit,
-                    "amount": item.amount,
-                }
-            else:
-                shopping_list[name]["amount"] += item.amount
-
-        response_data = "\n".join(
-            f"{name}: {data['amount']} {data['measurement_unit']}"
-            for name, data in shopping_list.items()
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            stream_shopping_list(shopping_list_totals(user), renderer.format),
+            content_type=f"{renderer.media_type}; charset=utf-8",
         )
-
-        response = Response(response_data, content_type="text/plain")
         response["Content-Disposition"] = (
-            'attachment; filename="shopping_list.txt"'
+            f'attachment; filename="shopping_list.{renderer.format}"'
         )
         return response
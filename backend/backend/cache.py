@@ -0,0 +1,60 @@
+"""Настройки кеша из переменных окружения.
+
+Переменные:
+    CACHE_BACKEND    — ``locmem`` (по умолчанию), ``file`` или ``redis``;
+    CACHE_DIR        — каталог кеша для ``file``;
+    REDIS_URL        — адрес Redis для ``redis``;
+    CACHE_KEY_PREFIX — префикс ключей;
+    CACHE_TIMEOUT    — время жизни записей по умолчанию в секундах;
+    WEB_CONCURRENCY  — число воркеров gunicorn (его же читает gunicorn).
+
+Версии кеша и сброс копий в памяти работают только через общий для
+воркеров кеш, поэтому ``locmem`` допустим лишь с одним воркером.
+"""
+
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+}
+SHARED_CACHE_BACKENDS = ("file", "redis")
+
+
+def web_concurrency():
+    value = os.environ.get("WEB_CONCURRENCY", "1")
+    if not value.isdigit() or int(value) < 1:
+        raise ImproperlyConfigured(
+            "WEB_CONCURRENCY must be a positive integer"
+        )
+    return int(value)
+
+
+def cache_config(base_dir):
+    """Возвращает CACHES и не дает запустить несколько воркеров с locmem."""
+    backend = os.getenv("CACHE_BACKEND", "locmem").lower()
+    if backend not in CACHE_BACKENDS:
+        raise ImproperlyConfigured(
+            f"CACHE_BACKEND must be one of {', '.join(CACHE_BACKENDS)}"
+        )
+    if backend not in SHARED_CACHE_BACKENDS and web_concurrency() > 1:
+        raise ImproperlyConfigured(
+            "CACHE_BACKEND=locmem is per process and cannot be used with "
+            "WEB_CONCURRENCY > 1; use CACHE_BACKEND=redis"
+        )
+    locations = {
+        "locmem": "foodgram",
+        "file": os.getenv("CACHE_DIR", os.path.join(base_dir, "cache")),
+        "redis": os.getenv("REDIS_URL", "redis://redis:6379/0"),
+    }
+    return {
+        "default": {
+            "BACKEND": CACHE_BACKENDS[backend],
+            "LOCATION": locations[backend],
+            "KEY_PREFIX": os.getenv("CACHE_KEY_PREFIX", "foodgram"),
+            "TIMEOUT": int(os.getenv("CACHE_TIMEOUT", 300)),
+        }
+    }
@@ -0,0 +1,91 @@
+"""Настройки подключения к БД из переменных окружения.
+
+Переменные (кроме USE_SQLITE действуют только для PostgreSQL):
+    USE_SQLITE           — SQLite вместо PostgreSQL (по умолчанию True);
+    DB_CONN_MAX_AGE      — время жизни соединения в секундах, ``none`` —
+                           без ограничения, 0 — новое соединение на запрос;
+    DB_CONN_HEALTH_CHECKS — проверять постоянное соединение перед запросом;
+    DB_POOLER_MODE       — ``transaction`` для внешнего пулера (PgBouncer в
+                           режиме транзакций): серверные курсоры отключаются;
+    DB_CONNECT_TIMEOUT   — таймаут установки соединения в секундах.
+"""
+
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+DEFAULT_CONN_MAX_AGE = 60
+POOLER_MODES = ("", "session", "transaction")
+
+
+def env_bool(name, default):
+    return os.environ.get(name, str(default)).lower() in ("true", "1", "yes")
+
+
+def parse_conn_max_age(value, async_views):
+    """Проверяет DB_CONN_MAX_AGE и возвращает значение для Django."""
+    if value is None:
+        return 0 if async_views else DEFAULT_CONN_MAX_AGE
+    if value.lower() == "none":
+        conn_max_age = None
+    else:
+        try:
+            conn_max_age = int(value)
+        except ValueError:
+            conn_max_age = -1
+        if conn_max_age < 0:
+            raise ImproperlyConfigured(
+                "DB_CONN_MAX_AGE must be a non-negative integer or 'none'"
+            )
+    if async_views and conn_max_age != 0:
+        raise ImproperlyConfigured(
+            "DB_CONN_MAX_AGE must be 0 with ASYNC_READ_VIEWS: async "
+            "requests run in new threads and never reuse connections; "
+            "use DB_POOLER_MODE with an external pooler instead"
+        )
+    return conn_max_age
+
+
+def database_config(base_dir, async_views=False):
+    """Возвращает DATABASES с проверенными настройками соединений."""
+    if env_bool("USE_SQLITE", True):
+        if os.environ.get("DB_POOLER_MODE"):
+            raise ImproperlyConfigured(
+                "DB_POOLER_MODE is only supported for PostgreSQL"
+            )
+        return {
+            "default": {
+                "ENGINE": "django.db.backends.sqlite3",
+                "NAME": os.path.join(base_dir, "db.sqlite3"),
+            }
+        }
+
+    pooler_mode = os.environ.get("DB_POOLER_MODE", "").lower()
+    if pooler_mode not in POOLER_MODES:
+        raise ImproperlyConfigured(
+            "DB_POOLER_MODE must be one of "
+            f"{', '.join(mode for mode in POOLER_MODES if mode)}"
+        )
+    options = {}
+    if connect_timeout := os.environ.get("DB_CONNECT_TIMEOUT"):
+        if not connect_timeout.isdigit():
+            raise ImproperlyConfigured(
+                "DB_CONNECT_TIMEOUT must be a positive integer"
+            )
+        options["connect_timeout"] = int(connect_timeout)
+    return {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.getenv("POSTGRES_DB", "django"),
+            "USER": os.getenv("POSTGRES_USER", "django"),
+            "PASSWORD": os.getenv("POSTGRES_PASSWORD", ""),
+            "HOST": os.getenv("DB_HOST", ""),
+            "PORT": os.getenv("DB_PORT", 5432),
+            "CONN_MAX_AGE": parse_conn_max_age(
+                os.environ.get("DB_CONN_MAX_AGE"), async_views
+            ),
+            "CONN_HEALTH_CHECKS": env_bool("DB_CONN_HEALTH_CHECKS", True),
+            "DISABLE_SERVER_SIDE_CURSORS": pooler_mode == "transaction",
+            "OPTIONS": options,
+        }
+    }
@@ -3,6 +3,9 @@ from pathlib import Path
 
 from django.core.management.utils import get_random_secret_key
 
+from backend.cache import cache_config
+from backend.database import database_config
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 
@@ -64,28 +67,15 @@ TEMPLATES = [
 WSGI_APPLICATION = "backend.wsgi.application"
 
 
-if use_sqlite := os.environ.get("USE_SQLITE", "True").lower() in (
+ASYNC_READ_VIEWS = os.environ.get("ASYNC_READ_VIEWS", "False").lower() in (
     "true",
     "1",
     "yes",
-):
-    DATABASES = {
-        "default": {
-            "ENGINE": "django.db.backends.sqlite3",
-            "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
-        }
-    }
-else:
-    DATABASES = {
-        "default": {
-            "ENGINE": "django.db.backends.postgresql",
-            "NAME": os.getenv("POSTGRES_DB", "django"),
-            "USER": os.getenv("POSTGRES_USER", "django"),
-            "PASSWORD": os.getenv("POSTGRES_PASSWORD", ""),
-            "HOST": os.getenv("DB_HOST", ""),
-            "PORT": os.getenv("DB_PORT", 5432),
-        }
-    }
+)
+
+DATABASES = database_config(BASE_DIR, async_views=ASYNC_READ_VIEWS)
+
+CACHES = cache_config(BASE_DIR)
 
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -117,6 +107,21 @@ STATIC_ROOT = os.path.join(BASE_DIR, "collected_static")
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+STORAGES = {
+    "default": {"BACKEND": "api.storages.ContentAddressedStorage"},
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
+
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", 2))
+IMAGE_MAX_UPLOAD_SIZE = int(
+    os.getenv("IMAGE_MAX_UPLOAD_SIZE", 10 * 1024 * 1024)
+)
+IMAGE_ALLOWED_TYPES = os.getenv(
+    "IMAGE_ALLOWED_TYPES", "image/jpeg image/png image/webp image/gif"
+).split()
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 AUTH_USER_MODEL = "users.FoodgramUser"
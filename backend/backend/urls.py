@@ -3,7 +3,10 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
-from api.recipe_utils import redirect_short_link
+if settings.ASYNC_READ_VIEWS:
+    from api.async_views import redirect_short_link
+else:
+    from api.recipe_utils import redirect_short_link
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -1,3 +1,8 @@
 #!/bin/sh
 
-gunicorn backend.wsgi:application --bind 0.0.0.0:9090
\ No newline at end of file
+case "$(echo "$ASYNC_READ_VIEWS" | tr '[:upper:]' '[:lower:]')" in
+  true|1|yes)
+    gunicorn backend.asgi:application -k uvicorn_worker.UvicornWorker --bind 0.0.0.0:9090 ;;
+  *)
+    gunicorn backend.wsgi:application --bind 0.0.0.0:9090 ;;
+esac
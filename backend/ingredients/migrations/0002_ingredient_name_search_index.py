@@ -0,0 +1,33 @@
+from django.db import migrations
+
+POSTGRES_INDEX = "ingredients_ingredient_name_trgm"
+
+
+# Поиск по подстроке (LIKE '%x%') ускоряется только триграммным индексом
+# PostgreSQL. В SQLite обычный индекс такой поиск не обслуживает, поэтому
+# там индекс не создается.
+def create_name_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {POSTGRES_INDEX} "
+            "ON ingredients_ingredient USING gin (UPPER(name) gin_trgm_ops)"
+        )
+
+
+def drop_name_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(f"DROP INDEX IF EXISTS {POSTGRES_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ingredients', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            create_name_search_index, drop_name_search_index
+        ),
+    ]
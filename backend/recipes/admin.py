@@ -1,5 +1,8 @@
 from django.contrib import admin
 
+from api.pantry_utils import record_pantry_changes
+from api.search_utils import update_search_index
+from api.similarity_utils import mark_similarity_stale
 from recipes.constants import ADMIN_PAGE_SIZE
 from recipes.models import Recipe, RecipeIngredientAmount, RecipeTags
 
@@ -36,7 +39,13 @@ class RecipeAdmin(admin.ModelAdmin):
     inlines = [RecipeIngredientAmountInline, TagInline]
     readonly_fields = ("subscribers_count",)
 
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        update_search_index([form.instance.pk])
+        record_pantry_changes([form.instance.pk])
+        mark_similarity_stale([form.instance.pk])
+
     @admin.display(description="Количество подписчиков")
     def subscribers_count(self, obj):
         """Количество подписчиков на рецепт."""
-        return obj.favorited.count() if obj.favorited else 0
+        return obj.favorites_count
@@ -1,5 +1,7 @@
 ADMIN_PAGE_SIZE = 20
 SLUG_LENGTH = 5
+SLUG_POOL_SIZE = 100
+SLUG_MAX_ATTEMPTS = 5
 DEFAULT_AMOUNT = 0
 NAME_LENGTH = 255
 COOKING_TIME_MIN = 1
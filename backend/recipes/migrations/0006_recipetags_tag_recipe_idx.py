@@ -0,0 +1,17 @@
+# Generated by Django 4.2.23 on 2026-10-18 04:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_recipe_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipetags',
+            index=models.Index(fields=['tag', 'recipe'], name='recipetags_tag_recipe_idx'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 4.2.23 on 2026-10-18 04:24
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+POSTGRES_INDEX = "recipes_recipe_search_vector_gin"
+SQLITE_TABLE = "recipes_recipe_fts"
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {POSTGRES_INDEX} "
+            "ON recipes_recipe USING gin (search_vector)"
+        )
+        schema_editor.execute(
+            "UPDATE recipes_recipe AS r SET search_vector = "
+            "setweight(to_tsvector('russian', r.name), 'A') || "
+            "setweight(to_tsvector('russian', coalesce(("
+            "SELECT string_agg(i.name, ' ') "
+            "FROM recipes_recipeingredientamount a "
+            "JOIN ingredients_ingredient i ON i.id = a.ingredient_id "
+            "WHERE a.recipe_id = r.id), '')), 'B') || "
+            "setweight(to_tsvector('russian', r.text), 'C')"
+        )
+    elif vendor == "sqlite":
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_TABLE} "
+            "USING fts5(name, ingredients, text, "
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {SQLITE_TABLE} (rowid, name, ingredients, text) "
+            "SELECT r.id, r.name, (SELECT group_concat(i.name, ' ') "
+            "FROM recipes_recipeingredientamount a "
+            "JOIN ingredients_ingredient i ON i.id = a.ingredient_id "
+            "WHERE a.recipe_id = r.id), r.text FROM recipes_recipe r"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(f"DROP INDEX IF EXISTS {POSTGRES_INDEX}")
+    elif vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SQLITE_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ingredients', '0002_ingredient_name_search_index'),
+        ('recipes', '0007_recipe_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.23 on 2026-10-18 04:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_recipe_scores'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeNeighbour',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Сходство')),
+            ],
+            options={
+                'verbose_name': 'Похожий рецепт',
+                'verbose_name_plural': 'Похожие рецепты',
+                'ordering': ('recipe', '-score'),
+            },
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='similarity_stale',
+            field=models.BooleanField(default=True, editable=False, verbose_name='Похожие рецепты устарели'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(condition=models.Q(('similarity_stale', True)), fields=['id'], name='recipe_similarity_stale_idx'),
+        ),
+        migrations.AddField(
+            model_name='recipeneighbour',
+            name='neighbour',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbour_of', to='recipes.recipe', verbose_name='Похожий рецепт'),
+        ),
+        migrations.AddField(
+            model_name='recipeneighbour',
+            name='recipe',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbours', to='recipes.recipe', verbose_name='Рецепт'),
+        ),
+        migrations.AddIndex(
+            model_name='recipeneighbour',
+            index=models.Index(fields=['recipe', '-score'], name='recipeneighbour_score_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='recipeneighbour',
+            unique_together={('recipe', 'neighbour')},
+        ),
+    ]
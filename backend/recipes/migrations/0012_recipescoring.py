@@ -0,0 +1,24 @@
+# Generated by Django 4.2.23 on 2026-10-18 04:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_recipe_neighbours'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeScoring',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scored_at', models.DateTimeField(null=True, verbose_name='Последний пересчет рейтингов')),
+            ],
+            options={
+                'verbose_name': 'Пересчет рейтингов',
+                'verbose_name_plural': 'Пересчеты рейтингов',
+            },
+        ),
+    ]
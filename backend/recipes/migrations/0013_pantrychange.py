@@ -0,0 +1,25 @@
+# Generated by Django 4.2.23 on 2026-10-18 04:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_recipescoring'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PantryChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recipe_id', models.BigIntegerField(verbose_name='Рецепт')),
+            ],
+            options={
+                'verbose_name': 'Изменение состава рецепта',
+                'verbose_name_plural': 'Изменения состава рецептов',
+                'ordering': ('id',),
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.23 on 2026-10-18 04:57
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0013_pantrychange'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='recipe',
+            name='scored_interactions',
+        ),
+    ]
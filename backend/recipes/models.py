@@ -1,9 +1,10 @@
-import shortuuid
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import IntegrityError, models, transaction
 
 from ingredients.models import Ingredient
 from recipes import constants as rc
+from recipes.slugs import slug_pool
 from tags.models import Tag
 
 
@@ -24,6 +25,17 @@ class Recipe(models.Model):
         verbose_name="Изображение рецепта",
         blank=True,
     )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name="Поисковый вектор",
+    )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name="Копии изображения",
+    )
     name = models.CharField(
         max_length=rc.NAME_LENGTH, verbose_name="Название рецепта"
     )
@@ -52,17 +64,73 @@ class Recipe(models.Model):
         verbose_name="Дата публикации",
         help_text="Дата и время публикации рецепта",
     )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Добавлений в избранное",
+    )
+    shopping_cart_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Добавлений в корзину покупок",
+    )
+    popularity_score = models.FloatField(
+        default=0,
+        editable=False,
+        verbose_name="Популярность",
+    )
+    trending_score = models.FloatField(
+        default=0,
+        editable=False,
+        verbose_name="Популярность за последнее время",
+    )
+    similarity_stale = models.BooleanField(
+        default=True,
+        editable=False,
+        verbose_name="Похожие рецепты устарели",
+    )
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = shortuuid.ShortUUID().random(length=rc.SLUG_LENGTH)
-        super().save(*args, **kwargs)
+        if self.slug:
+            return super().save(*args, **kwargs)
+        for attempt in range(rc.SLUG_MAX_ATTEMPTS):
+            self.slug = slug_pool.allocate()
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                taken = Recipe.objects.filter(slug=self.slug).exists()
+                self.slug = ""
+                if not taken or attempt == rc.SLUG_MAX_ATTEMPTS - 1:
+                    raise
 
     class Meta:
         verbose_name = "Рецепт"
         verbose_name_plural = "Рецепты"
         default_related_name = "recipes"
-        ordering = ("-pub_date",)
+        ordering = ("-pub_date", "-id")
+        indexes = (
+            models.Index(
+                fields=("-pub_date", "-id"), name="recipe_pub_date_id_idx"
+            ),
+            models.Index(
+                fields=("author", "-pub_date", "-id"),
+                name="recipe_author_pub_date_idx",
+            ),
+            models.Index(
+                fields=("-popularity_score", "-pub_date", "-id"),
+                name="recipe_popularity_idx",
+            ),
+            models.Index(
+                fields=("-trending_score", "-pub_date", "-id"),
+                name="recipe_trending_idx",
+            ),
+            models.Index(
+                fields=("id",),
+                condition=models.Q(similarity_stale=True),
+                name="recipe_similarity_stale_idx",
+            ),
+        )
 
     def __str__(self):
         return self.name
@@ -108,6 +176,75 @@ class RecipeTags(models.Model):
         unique_together = ("recipe", "tag")
         default_related_name = "recipe_tags"
         ordering = ("recipe", "tag")
+        indexes = [
+            models.Index(
+                fields=["tag", "recipe"], name="recipetags_tag_recipe_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.tag.name}"
+
+
+class RecipeNeighbour(models.Model):
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="neighbours",
+        verbose_name="Рецепт",
+    )
+    neighbour = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="neighbour_of",
+        verbose_name="Похожий рецепт",
+    )
+    score = models.FloatField(verbose_name="Сходство")
+
+    class Meta:
+        unique_together = ("recipe", "neighbour")
+        verbose_name = "Похожий рецепт"
+        verbose_name_plural = "Похожие рецепты"
+        ordering = ("recipe", "-score")
+        indexes = [
+            models.Index(
+                fields=["recipe", "-score"], name="recipeneighbour_score_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.neighbour} похож на {self.recipe}"
+
+
+class RecipeScoring(models.Model):
+    """Единственная строка с временем последнего пересчета рейтингов."""
+
+    scored_at = models.DateTimeField(
+        null=True, verbose_name="Последний пересчет рейтингов"
+    )
+
+    class Meta:
+        verbose_name = "Пересчет рейтингов"
+        verbose_name_plural = "Пересчеты рейтингов"
+
+    def __str__(self):
+        return f"Рейтинги пересчитаны {self.scored_at}"
+
+
+class PantryChange(models.Model):
+    """Журнал рецептов, у которых изменился состав ингредиентов.
+
+    Номер записи служит позицией журнала для копий индекса кладовой.
+    Ссылка на рецепт не внешний ключ: удаление рецепта тоже попадает в
+    журнал.
+    """
+
+    recipe_id = models.BigIntegerField(verbose_name="Рецепт")
+
+    class Meta:
+        verbose_name = "Изменение состава рецепта"
+        verbose_name_plural = "Изменения состава рецептов"
+        ordering = ("id",)
+
+    def __str__(self):
+        return f"Изменен рецепт {self.recipe_id}"
@@ -0,0 +1,42 @@
+import threading
+from collections import deque
+
+import shortuuid
+from django.apps import apps
+
+from recipes import constants as rc
+
+
+class SlugPool:
+    """Запас заранее сгенерированных свободных коротких ссылок.
+
+    Кандидаты генерируются пачкой и проверяются на занятость одним
+    запросом. Два процесса все же могут выдать один слаг, поэтому
+    Recipe.save повторяет вставку при конфликте.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._slugs = deque()
+        self._lock = threading.Lock()
+
+    def refill(self):
+        generator = shortuuid.ShortUUID()
+        candidates = {
+            generator.random(length=rc.SLUG_LENGTH) for _ in range(self.size)
+        }
+        taken = set(
+            apps.get_model("recipes", "Recipe")
+            .objects.filter(slug__in=candidates)
+            .values_list("slug", flat=True)
+        )
+        self._slugs.extend(candidates - taken)
+
+    def allocate(self):
+        with self._lock:
+            while not self._slugs:
+                self.refill()
+            return self._slugs.popleft()
+
+
+slug_pool = SlugPool(rc.SLUG_POOL_SIZE)
@@ -1,2 +1,8 @@
 EMAIL_MAX_LENGTH = 123
 ADMIN_PAGE_SIZE = 20
+INTERACTION_FAVORITE = "favorite"
+INTERACTION_SHOPPING_CART = "shopping_cart"
+INTERACTION_KINDS = (
+    (INTERACTION_FAVORITE, "Избранное"),
+    (INTERACTION_SHOPPING_CART, "Корзина покупок"),
+)
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.23 on 2026-10-18 04:05
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(model, field):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        0,
+    )
+
+
+def fill_counters(apps, schema_editor):
+    user_model = apps.get_model("users", "FoodgramUser")
+    recipe_model = apps.get_model("recipes", "Recipe")
+    subscription_model = apps.get_model("users", "Subscription")
+    user_model.objects.update(
+        recipes_count=count_subquery(recipe_model, "author"),
+        subscribers_count=count_subquery(subscription_model, "author"),
+    )
+    recipe_model.objects.update(
+        favorites_count=count_subquery(
+            user_model.is_favorited.through, "recipe"
+        ),
+        shopping_cart_count=count_subquery(
+            user_model.is_in_shopping_cart.through, "recipe"
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_alter_foodgramuser_options_and_more'),
+        ('recipes', '0005_recipe_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='foodgramuser',
+            name='recipes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество рецептов'),
+        ),
+        migrations.AddField(
+            model_name='foodgramuser',
+            name='subscribers_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество подписчиков'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 4.2.23 on 2026-10-18 04:58
+
+import datetime
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+BATCH_SIZE = 1000
+# Существующие добавления уже учтены в рейтингах, поэтому получают время
+# заведомо раньше любого пересчета.
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def fill_interactions(apps, schema_editor):
+    user_model = apps.get_model("users", "FoodgramUser")
+    interaction_model = apps.get_model("users", "RecipeInteraction")
+    sources = (
+        ("favorite", user_model.is_favorited.through),
+        ("shopping_cart", user_model.is_in_shopping_cart.through),
+    )
+    for kind, through in sources:
+        rows = through.objects.values_list("foodgramuser_id", "recipe_id")
+        interaction_model.objects.bulk_create(
+            (
+                interaction_model(
+                    user_id=user_id,
+                    recipe_id=recipe_id,
+                    kind=kind,
+                    created_at=EPOCH,
+                )
+                for user_id, recipe_id in rows.iterator(chunk_size=BATCH_SIZE)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0014_remove_recipe_scored_interactions'),
+        ('users', '0005_feedentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeInteraction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('favorite', 'Избранное'), ('shopping_cart', 'Корзина покупок')], max_length=16, verbose_name='Список')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Время добавления')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='interactions', to='recipes.recipe', verbose_name='Рецепт')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipe_interactions', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Добавление рецепта',
+                'verbose_name_plural': 'Добавления рецептов',
+                'ordering': ('-created_at',),
+                'indexes': [models.Index(fields=['recipe', 'created_at'], name='interaction_recipe_time_idx')],
+                'unique_together': {('user', 'recipe', 'kind')},
+            },
+        ),
+        migrations.RunPython(fill_interactions, migrations.RunPython.noop),
+    ]
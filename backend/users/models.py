@@ -1,9 +1,10 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 
 from recipes.models import Recipe
-from users.constans import EMAIL_MAX_LENGTH
+from users.constans import EMAIL_MAX_LENGTH, INTERACTION_KINDS
 
 
 class FoodgramUser(AbstractUser):
@@ -14,6 +15,12 @@ class FoodgramUser(AbstractUser):
         blank=True,
         verbose_name="Avatar",
     )
+    avatar_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name="Копии аватара",
+    )
     is_favorited = models.ManyToManyField(
         Recipe,
         blank=True,
@@ -33,6 +40,16 @@ class FoodgramUser(AbstractUser):
     password = models.CharField(
         verbose_name="Пароль", blank=False, max_length=EMAIL_MAX_LENGTH
     )
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Количество рецептов",
+    )
+    subscribers_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Количество подписчиков",
+    )
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ("username",)
 
@@ -71,3 +88,78 @@ class Subscription(models.Model):
 
     def __str__(self):
         return f"{self.subscriber} подписан на {self.author}"
+
+
+class FeedEntry(models.Model):
+    """Запись ленты подписок, разложенная при публикации рецепта."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="feed_entries",
+        verbose_name="Подписчик",
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="feed_entries",
+        verbose_name="Рецепт",
+    )
+    pub_date = models.DateTimeField(verbose_name="Дата публикации")
+
+    class Meta:
+        unique_together = ("user", "recipe")
+        verbose_name = "Запись ленты"
+        verbose_name_plural = "Записи ленты"
+        ordering = ("user", "-pub_date", "-recipe_id")
+        indexes = (
+            models.Index(
+                fields=("user", "-pub_date", "-recipe"),
+                name="feedentry_user_pub_date_idx",
+            ),
+        )
+
+    def __str__(self):
+        return f"{self.recipe} в ленте {self.user}"
+
+
+class RecipeInteraction(models.Model):
+    """Первое добавление рецепта пользователем в избранное или корзину.
+
+    Запись не удаляется при удалении рецепта из списка, поэтому
+    повторное добавление не считается новым.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="recipe_interactions",
+        verbose_name="Пользователь",
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="interactions",
+        verbose_name="Рецепт",
+    )
+    kind = models.CharField(
+        max_length=16, choices=INTERACTION_KINDS, verbose_name="Список"
+    )
+    created_at = models.DateTimeField(
+        default=timezone.now, verbose_name="Время добавления"
+    )
+
+    class Meta:
+        unique_together = ("user", "recipe", "kind")
+        verbose_name = "Добавление рецепта"
+        verbose_name_plural = "Добавления рецептов"
+        ordering = ("-created_at",)
+        indexes = (
+            models.Index(
+                fields=("recipe", "created_at"),
+                name="interaction_recipe_time_idx",
+            ),
+        )
+
+    def __str__(self):
+        return f"{self.recipe} у {self.user}: {self.get_kind_display()}"
@@ -1,3 +1,25 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Prefetch, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from api.cache_utils import invalidate
+from recipes.models import Recipe
+from users.constans import INTERACTION_FAVORITE, INTERACTION_SHOPPING_CART
+from users.models import RecipeInteraction, Subscription
+
+User = get_user_model()
+
+FAVORITES = User.is_favorited.through
+SHOPPING_CART = User.is_in_shopping_cart.through
+
+
+def change_counter(model, pk, field, delta):
+    model.objects.filter(pk=pk).update(
+        **{field: Greatest(F(field) + delta, 0)}
+    )
+
+
 def has_favorite(user, recipe):
     return user.is_favorited.filter(id=recipe.id).exists()
 
@@ -6,14 +28,71 @@ def has_in_cart(user, recipe):
     return user.is_in_shopping_cart.filter(id=recipe.id).exists()
 
 
+def record_interaction(user, recipe, kind):
+    """Запоминает время первого добавления рецепта в список."""
+    RecipeInteraction.objects.get_or_create(
+        user=user, recipe=recipe, kind=kind
+    )
+
+
+@transaction.atomic
+def add_favorite(user, recipe):
+    _, created = FAVORITES.objects.get_or_create(
+        foodgramuser=user, recipe=recipe
+    )
+    if created:
+        change_counter(Recipe, recipe.pk, "favorites_count", 1)
+        record_interaction(user, recipe, INTERACTION_FAVORITE)
+        invalidate(f"user:{user.pk}")
+
+
+@transaction.atomic
+def remove_favorite(user, recipe):
+    deleted, _ = FAVORITES.objects.filter(
+        foodgramuser=user, recipe=recipe
+    ).delete()
+    if deleted:
+        change_counter(Recipe, recipe.pk, "favorites_count", -deleted)
+        invalidate(f"user:{user.pk}")
+
+
+@transaction.atomic
+def add_to_cart(user, recipe):
+    _, created = SHOPPING_CART.objects.get_or_create(
+        foodgramuser=user, recipe=recipe
+    )
+    if created:
+        change_counter(Recipe, recipe.pk, "shopping_cart_count", 1)
+        record_interaction(user, recipe, INTERACTION_SHOPPING_CART)
+        invalidate(f"user:{user.pk}")
+
+
+@transaction.atomic
+def remove_from_cart(user, recipe):
+    deleted, _ = SHOPPING_CART.objects.filter(
+        foodgramuser=user, recipe=recipe
+    ).delete()
+    if deleted:
+        change_counter(Recipe, recipe.pk, "shopping_cart_count", -deleted)
+        invalidate(f"user:{user.pk}")
+
+
+@transaction.atomic
 def subscribe(user, target_user):
-    return user.subscriptions.get_or_create(
+    subscription, created = user.subscriptions.get_or_create(
         subscriber=user, author=target_user
     )
+    if created:
+        change_counter(User, target_user.pk, "subscribers_count", 1)
+    return subscription, created
 
 
+@transaction.atomic
 def unsubscribe(user, target_user):
-    return user.subscriptions.filter(author=target_user).delete()
+    deleted = user.subscriptions.filter(author=target_user).delete()
+    if deleted[0]:
+        change_counter(User, target_user.pk, "subscribers_count", -deleted[0])
+    return deleted
 
 
 def is_subscribed(user, target_user):
@@ -34,9 +113,66 @@ def all_subscriptions(user):
     return user.subscriptions.all()
 
 
+def subscribed_authors(user, recipes_limit=None):
+    """Авторы, на которых подписан пользователь, с последними рецептами."""
+    recipes = Recipe.objects.only(
+        "id",
+        "author",
+        "name",
+        "image",
+        "image_variants",
+        "cooking_time",
+        "pub_date",
+    )
+    if recipes_limit is not None:
+        recipes = recipes[:recipes_limit]
+    return (
+        User.objects.filter(subscribers__subscriber=user)
+        .annotate(is_subscribed=Value(True))
+        .prefetch_related(
+            Prefetch("recipes", queryset=recipes, to_attr="latest_recipes")
+        )
+    )
+
+
 def favorited(user):
     return user.is_favorited.all()
 
 
 def shopping_cart(user):
     return user.is_in_shopping_cart.all()
+
+
+def _count_subquery(model, field):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        0,
+    )
+
+
+COUNTERS = (
+    (User, "recipes_count", Recipe, "author"),
+    (User, "subscribers_count", Subscription, "author"),
+    (Recipe, "favorites_count", FAVORITES, "recipe"),
+    (Recipe, "shopping_cart_count", SHOPPING_CART, "recipe"),
+)
+
+
+def recount_counters():
+    """Пересчитывает счетчики и возвращает число исправленных строк."""
+    repaired = {}
+    for model, counter, source, field in COUNTERS:
+        actual = _count_subquery(source, field)
+        with transaction.atomic():
+            repaired[f"{model._meta.label}.{counter}"] = (
+                model.objects.exclude(**{counter: actual}).update(
+                    **{counter: actual}
+                )
+            )
+    return repaired